@@ -38,6 +38,7 @@ function App() {
         <Chat 
           refNumber={refNumber} 
           documentSummary={documentSummary}
+          onSummary={setDocumentSummary}
           onComplete={handleChatComplete}
         />
       )}
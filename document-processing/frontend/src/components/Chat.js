@@ -1,13 +1,16 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './Chat.css';
 
-function Chat({ refNumber, documentSummary, onComplete }) {
+const STATUS_POLL_INTERVAL_MS = 1000;
+
+function Chat({ refNumber, documentSummary, onSummary, onComplete }) {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
   const [progress, setProgress] = useState({ filled: 0, total: 0 });
   const [currentPlaceholder, setCurrentPlaceholder] = useState(null);
   const [showAutoSuggest, setShowAutoSuggest] = useState(false);
+  const [processingFailed, setProcessingFailed] = useState(false);
   const messagesEndRef = useRef(null);
 
   const scrollToBottom = () => {
@@ -23,11 +26,44 @@ function Chat({ refNumber, documentSummary, onComplete }) {
     loadNextQuestion();
   }, []);
 
+  const waitForProcessing = async () => {
+    // Background processing is polled through the cheap /status endpoint
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, STATUS_POLL_INTERVAL_MS));
+      const response = await fetch(`/status/${refNumber}`);
+      const data = await response.json();
+      if (data.processing_status !== 'processing') {
+        return;
+      }
+    }
+  };
+
   const loadNextQuestion = async () => {
     setLoading(true);
     try {
       const response = await fetch(`/placeholders/${refNumber}`);
       const data = await response.json();
+
+      // 202: summary and types are still being produced after upload
+      if (data.processing_status === 'processing') {
+        await waitForProcessing();
+        await loadNextQuestion();
+        return;
+      }
+      
+      // The summary is produced in the background after upload, so pick it up here
+      if (data.document_summary) {
+        onSummary(data.document_summary);
+      }
+
+      if (data.processing_status === 'failed') {
+        setProcessingFailed(true);
+        setMessages(prev => [...prev, {
+          type: 'error',
+          text: 'Document processing failed: ' + (data.processing_error || 'Unknown error')
+        }]);
+        return;
+      }
       
       setProgress({
         filled: data.progress.filled + data.progress.auto_filled,
@@ -126,6 +162,13 @@ function Chat({ refNumber, documentSummary, onComplete }) {
         }]);
         setShowAutoSuggest(false);
         setTimeout(() => loadNextQuestion(), 1000);
+
+      } else if (data.error) {
+        // e.g. 409 while type inference is still running
+        setMessages(prev => [...prev, {
+          type: 'error',
+          text: data.error
+        }]);
       }
     } catch (err) {
       setMessages(prev => [...prev, {
@@ -137,6 +180,31 @@ function Chat({ refNumber, documentSummary, onComplete }) {
     }
   };
 
+  const handleRetryProcessing = async () => {
+    setProcessingFailed(false);
+    setLoading(true);
+    try {
+      const response = await fetch(`/retry_processing/${refNumber}`, {
+        method: 'POST'
+      });
+
+      if (!response.ok) {
+        const data = await response.json();
+        throw new Error(data.error || 'Unknown error');
+      }
+    } catch (err) {
+      setMessages(prev => [...prev, {
+        type: 'error',
+        text: 'Error retrying processing: ' + err.message
+      }]);
+    } finally {
+      setLoading(false);
+    }
+
+    // Polls /status until the retried processing finishes
+    await loadNextQuestion();
+  };
+
   const handleSkipAutoSuggest = () => {
     setShowAutoSuggest(false);
     setMessages(prev => [...prev, {
@@ -268,6 +336,14 @@ function Chat({ refNumber, documentSummary, onComplete }) {
         </div>
 
         <div className="chat-input-container">
+          {processingFailed && (
+            <div className="auto-suggest-buttons">
+              <button onClick={handleRetryProcessing} className="accept-btn">
+                🔄 Retry Processing
+              </button>
+            </div>
+          )}
+
           {showAutoSuggest && (
             <div className="auto-suggest-buttons">
               <button onClick={handleAcceptAutoSuggest} className="accept-btn">
@@ -285,12 +361,12 @@ function Chat({ refNumber, documentSummary, onComplete }) {
               value={input}
               onChange={(e) => setInput(e.target.value)}
               placeholder="Type your answer..."
-              disabled={loading || showAutoSuggest}
+              disabled={loading || showAutoSuggest || processingFailed}
               className="chat-input"
             />
             <button 
               type="submit" 
-              disabled={loading || !input.trim() || showAutoSuggest}
+              disabled={loading || !input.trim() || showAutoSuggest || processingFailed}
               className="send-btn"
             >
               Send
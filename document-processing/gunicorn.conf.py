@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for production runs
+Usage (from document-processing/): gunicorn -c gunicorn.conf.py app:app
+
+The gevent worker monkey-patches sockets before the app is imported, so the
+OpenAI (httpx) calls yield while waiting and each worker serves many requests
+"""
+
+import os
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5051')
+worker_class = 'gevent'
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+# LLM round-trips can take several seconds
+timeout = 120
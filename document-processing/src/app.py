@@ -1,24 +1,51 @@
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, request, jsonify, send_file, render_template, Response
 from werkzeug.utils import secure_filename
-from docx import Document
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
 from dotenv import load_dotenv
+import functools
+import io
+import logging
 import os
+import importlib.util
+import httpx
 import json
+import orjson
+import threading
+import time
 from datetime import datetime
+from urllib.parse import quote
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import modular utilities
 from utils.file_utils import get_next_reference_number, create_reference_folder
-from utils.placeholder_utils import extract_document_text, detect_placeholders, create_marked_document
+from utils.placeholder_utils import (
+    extract_document_text, compile_placeholder_patterns, detect_placeholders, create_marked_document
+)
 from utils.summary_utils import generate_document_summary
-from utils.config_utils import load_models_config, get_model_from_env, load_type_map_config
+from utils.config_utils import (
+    load_models_config, get_model_from_env, load_type_map_config, load_placeholder_patterns_config
+)
 from utils.llm_type_inference import enrich_placeholders_with_llm_types
-from utils.json_io import load_reference_json, save_reference_json, get_placeholder_by_id, update_facts_overlay
+from utils.json_io import (
+    OrjsonProvider, load_reference_json, load_reference_json_cached, load_reference_file,
+    save_reference_json, save_placeholder_update,
+    save_document_text, load_document_text, build_progress, build_placeholder_indexes,
+    get_placeholder_by_id, update_facts_overlay
+)
 from utils.prompt_utils import update_prompt_cache
-from utils.log_utils import log_action
+from utils.log_utils import log_action, setup_logging
 from utils.validation_utils_v2 import validate_with_llm_v2, normalize_value_v2
 from utils.autofill_utils import auto_suggest_value
 from utils.doc_generation_utils import replace_placeholders_in_document, check_all_filled
+from utils.batch_utils import (
+    BATCH_PENDING_STATUSES, submit_type_inference_batch, poll_batch_status, is_batch_finished,
+    claim_batch_ingest, release_batch_ingest, apply_batch_results
+)
+
+# Log records are written by a background thread (see setup_logging)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 doc_processing_root = os.path.dirname(os.path.dirname(__file__))
@@ -29,12 +56,46 @@ models_config = load_models_config()
 QA_MODEL = get_model_from_env('qa', models_config['qa_model'])
 VALIDATION_MODEL = get_model_from_env('validation', models_config['validation_model'])
 
-print(f"Loaded models - QA: {QA_MODEL}, Validation: {VALIDATION_MODEL}")
+logger.info(f"Loaded models - QA: {QA_MODEL}, Validation: {VALIDATION_MODEL}")
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+OPENAI_MAX_RETRIES = 3  # SDK-level retries per call; the only retry layer for OpenAI requests
+OPENAI_TIMEOUT = httpx.Timeout(60.0, connect=5.0)  # Per attempt
+
+# OpenAI client, created on first use so importing the app (worker boot, tests,
+# /health) doesn't pay for the HTTP client and TLS setup
+@functools.cache
+def get_openai_client():
+    """
+    Get the shared OpenAI client
+    One pooled HTTP client shared by all threads; HTTP/2 multiplexes the concurrent
+    prompt/validation calls over a single connection when h2 is installed
+    429s and transient errors are retried by the SDK (exponential backoff, honours Retry-After)
+    
+    Returns:
+        OpenAI: Client instance
+    """
+    return OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        max_retries=OPENAI_MAX_RETRIES,
+        timeout=OPENAI_TIMEOUT,
+        http_client=DefaultHttpxClient(
+            http2=importlib.util.find_spec('h2') is not None,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=OPENAI_TIMEOUT
+        )
+    )
+
+
+# Background threads for speculative LLM calls that overlap request-path calls
+llm_executor = ThreadPoolExecutor(max_workers=4)
+
+# Background threads for the LLM half of /upload (summary + type inference)
+upload_executor = ThreadPoolExecutor(max_workers=4)
+# Serializes the failed -> processing transition so a retry is only submitted once
+processing_retry_lock = threading.Lock()
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # orjson-backed jsonify / get_json
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -42,36 +103,43 @@ UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 CONFIG_FOLDER = os.path.join(BASE_DIR, 'config')
 PATTERNS_CONFIG_FILE = os.path.join(CONFIG_FOLDER, 'placeholder_patterns.json')
 COUNTER_FILE = os.path.join(UPLOAD_FOLDER, '.counter.txt')
+LLM_CACHE_FILE = os.path.join(UPLOAD_FOLDER, '.llm_cache.sqlite')  # Summary, question and validation responses keyed by prompt
 ALLOWED_EXTENSIONS = {'docx'}
+PROMPT_GENERATION_WORKERS = 10  # Concurrent OpenAI calls for lazy prompt generation
+PROCESSING_STALE_SECONDS = 900  # A job still 'processing' after this was lost (e.g. worker restart) and counts as failed
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+# Internal nginx location mapped to UPLOAD_FOLDER; when set, downloads are handed off via X-Accel-Redirect
+X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE') == '1'  # Apache/lighttpd serve send_file paths
 
 # Ensure folders exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(CONFIG_FOLDER, exist_ok=True)
 
 
+# Compiled regexes for the last patterns config (config_utils reuses the parsed
+# dict until the file changes, so identity tells whether it can be reused)
+_compiled_patterns_cache = {'config': None, 'compiled': None}
+
+
 def load_placeholder_patterns():
-    """Load placeholder patterns from the configuration file"""
-    try:
-        if os.path.exists(PATTERNS_CONFIG_FILE):
-            with open(PATTERNS_CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return config
-        else:
-            return {
-                "patterns": [
-                    {
-                        "name": "square_brackets",
-                        "regex": "\\[([A-Za-z0-9\\s_\\-]+)\\]",
-                        "enabled": True
-                    }
-                ],
-                "context_words_count": 20
-            }
-    except Exception as e:
-        print(f"Error loading patterns config: {str(e)}")
-        return {"patterns": [], "context_words_count": 20}
+    """
+    Load placeholder patterns from the configuration file
+    Parsed once per file change by config_utils.read_config_json
+    """
+    return load_placeholder_patterns_config()
+
+
+def get_compiled_placeholder_patterns(patterns_config):
+    """Get precompiled regexes for a config returned by load_placeholder_patterns"""
+    if patterns_config is not _compiled_patterns_cache['config']:
+        _compiled_patterns_cache.update({
+            'config': patterns_config,
+            'compiled': compile_placeholder_patterns(patterns_config)
+        })
+    return _compiled_patterns_cache['compiled']
 
 
 def allowed_file(filename):
@@ -90,6 +158,11 @@ def upload_document():
     """
     Handle document upload and processing
     
+    Form fields:
+        file: The .docx document
+        use_batch_api: Optional, "true" to run type inference through the
+            OpenAI Batch API (cheaper, results ingested on later requests)
+    
     Returns:
         JSON response with document information and detected placeholders
     """
@@ -101,6 +174,8 @@ def upload_document():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
+    use_batch_api = request.form.get('use_batch_api', '').lower() in ('1', 'true', 'yes')
+    
     if file and allowed_file(file.filename):
         try:
             # Generate reference number and create folder structure
@@ -108,60 +183,55 @@ def upload_document():
             ref_folder = create_reference_folder(UPLOAD_FOLDER, ref_number)
             
             # Secure filename and prepare paths
-            filename = secure_filename(file.filename)
+            base_name, ext = os.path.splitext(secure_filename(file.filename))
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            base_name = os.path.splitext(filename)[0]
-            ext = os.path.splitext(filename)[1]
+            file_prefix = f"{base_name}_{timestamp}"
             
             # Save original document
-            original_filename = f"{base_name}_{timestamp}_original{ext}"
+            original_filename = f"{file_prefix}_original{ext}"
             original_filepath = os.path.join(ref_folder, original_filename)
-            file.save(original_filepath)
+            # Read the upload once (bounded by MAX_CONTENT_LENGTH); the same bytes are
+            # written to disk and parsed, so the saved file is never read back
+            file_bytes = file.read()
+            with open(original_filepath, 'wb') as f:
+                f.write(file_bytes)
             
             # Parse document and extract text
-            doc = Document(original_filepath)
+            from docx import Document  # python-docx/lxml is only needed once a file arrives
+            doc = Document(io.BytesIO(file_bytes))
             full_document_text = extract_document_text(doc)
             
             # Truncate if exceeds max size
             max_chars = models_config.get('max_document_chars', 200000)
-            document_text = full_document_text[:max_chars] if len(full_document_text) > max_chars else full_document_text
+            was_truncated = len(full_document_text) > max_chars
+            document_text = full_document_text[:max_chars] if was_truncated else full_document_text
+            
+            # Bulk text lives in a sidecar file, not in the per-request JSON
+            document_text_path = save_document_text(ref_folder, document_text)
             
             # Load patterns config
             patterns_config = load_placeholder_patterns()
             
-            # Generate document summary FIRST (needed for type inference)
-            print("Generating document summary...")
-            document_summary = generate_document_summary(document_text, openai_client, QA_MODEL)
-            
-            # Detect placeholders
-            placeholders = detect_placeholders(document_text, patterns_config)
-            
-            # Type inference using LLM - much smarter than keyword matching
-            if len(placeholders) > 0:
-                print(f"Running LLM type inference for {len(placeholders)} placeholders...")
-                placeholders = enrich_placeholders_with_llm_types(
-                    placeholders,
-                    document_summary,
-                    openai_client,
-                    VALIDATION_MODEL  # Use GPT-5-nano for type inference
-                )
-                print("Type inference complete")
+            # Detect placeholders first (regex only) so empty templates skip all LLM work
+            placeholders = detect_placeholders(
+                document_text,
+                patterns_config,
+                get_compiled_placeholder_patterns(patterns_config)
+            )
             
             # Create marked document
-            marked_filename = f"{base_name}_{timestamp}_placeholder_marked{ext}"
+            marked_filename = f"{file_prefix}_placeholder_marked{ext}"
             marked_filepath = os.path.join(ref_folder, marked_filename)
-            create_marked_document(original_filepath, placeholders, marked_filepath)
+            # Reuse the parsed document; its text has already been extracted
+            create_marked_document(doc, placeholders, marked_filepath)
             
             # Prepare JSON output
-            json_filename = f"{base_name}_{timestamp}_placeholders.json"
+            json_filename = f"{file_prefix}_placeholders.json"
             json_filepath = os.path.join(ref_folder, json_filename)
             
             context_words_count = patterns_config.get('context_words_count', 20)
             placeholders_summary = [p['placeholder_name'] for p in placeholders]
-            
-            # Check if document was truncated
-            max_chars = models_config.get('max_document_chars', 200000)
-            was_truncated = len(document_text) > max_chars
+            placeholder_index, name_to_ids = build_placeholder_indexes(placeholders)
             
             # Determine validation status
             if len(placeholders) == 0:
@@ -169,16 +239,16 @@ def upload_document():
             else:
                 validation_status = "pending"
             
+            # Summary and type inference run in the background (see process_document_llm)
+            processing_status = "processing" if len(placeholders) > 0 else "ready"
+            processing_started_at = datetime.now().isoformat() if processing_status == "processing" else None
+            
             # Extend each placeholder with Phase 2 fields
-            # Note: expected_type and priority already set by type inference above
+            # Note: expected_type and priority are filled in by background type inference
             for placeholder in placeholders:
-                # Only add fields that weren't set by type inference
-                if 'expected_type' not in placeholder:
-                    placeholder['expected_type'] = None
-                if 'priority' not in placeholder:
-                    placeholder['priority'] = None
-                    
                 placeholder.update({
+                    "expected_type": None,
+                    "priority": None,
                     "prompt_text": None,
                     "prompt_meta": {
                         "generated_from_hash": None,
@@ -196,8 +266,8 @@ def upload_document():
                 "original_document": original_filename,
                 "marked_document": marked_filename,
                 "upload_timestamp": timestamp,
-                "document_text": document_text,
-                "document_summary": document_summary,
+                "document_text_path": document_text_path,
+                "document_summary": None,
                 "context_policy": {
                     "before_words_default": context_words_count,
                     "after_words_default": context_words_count
@@ -206,17 +276,25 @@ def upload_document():
                 "facts_overlay": {},
                 "facts_overlay_by_name": {},
                 "validation_status": validation_status,
+                "processing_status": processing_status,
+                "processing_started_at": processing_started_at,
+                "batch_job": None,
                 "placeholders_summary": placeholders_summary,
                 "total_placeholders": len(placeholders),
+                "placeholder_index": placeholder_index,
+                "name_to_ids": name_to_ids,
                 "placeholders": placeholders
             }
             
             # Save JSON
-            with open(json_filepath, 'w', encoding='utf-8') as f:
-                json.dump(placeholder_data, f, indent=2, ensure_ascii=False)
+            with open(json_filepath, 'wb') as f:
+                f.write(orjson.dumps(placeholder_data, option=orjson.OPT_INDENT_2))
+            
+            logger.info(f"✓ Document processed with {len(placeholders)} placeholders")
+            logger.info(f"✓ Files saved in uploads/{ref_number}/")
             
-            print(f"✓ Document processed with {len(placeholders)} placeholders")
-            print(f"✓ Files saved in uploads/{ref_number}/")
+            if processing_status == "processing":
+                upload_executor.submit(process_document_llm, ref_folder, use_batch_api, processing_started_at)
             
             # Get first pending placeholder
             first_pending = next((p for p in placeholders if p['status'] == 'pending'), None)
@@ -233,9 +311,10 @@ def upload_document():
                     'original_document': original_filename,
                     'marked_document': marked_filename,
                     'json_file': json_filename,
-                    'document_summary': document_summary,
+                    'document_summary': None,
                     'truncated': was_truncated,
                     'validation_status': validation_status,
+                    'processing_status': processing_status,
                     'total_placeholders': len(placeholders),
                     'pending_count': pending_count,
                     'first_pending_id': first_pending['placeholder_id'] if first_pending else None,
@@ -243,7 +322,8 @@ def upload_document():
                 }
             }
             
-            return jsonify(response), 200
+            # 202 while the LLM work is still running; poll /status/<ref> for processing_status
+            return jsonify(response), 202 if processing_status == "processing" else 200
             
         except Exception as e:
             return jsonify({
@@ -256,23 +336,241 @@ def upload_document():
         }), 400
 
 
+def process_document_llm(ref_folder, use_batch_api, started_at):
+    """
+    Background half of /upload: document summary and type inference
+    Reads the document text from its sidecar file, writes the results into the
+    reference JSON and marks it ready
+    
+    Results are discarded if a retry has taken the reference over in the meantime
+    (its processing_started_at no longer matches started_at)
+    
+    Args:
+        ref_folder: Path to the reference folder
+        use_batch_api: Submit type inference through the OpenAI Batch API
+        started_at: processing_started_at this run was submitted with
+    """
+    try:
+        data = load_reference_json(ref_folder)
+        placeholders = data['placeholders']
+        document_text = load_document_text(ref_folder, data)
+        
+        # Generate document summary FIRST (needed for type inference)
+        logger.info("Generating document summary...")
+        document_summary = generate_document_summary(
+            document_text,
+            get_openai_client(),
+            QA_MODEL,
+            cache_path=LLM_CACHE_FILE
+        )
+        
+        # Type inference using LLM - much smarter than keyword matching
+        batch_job = None
+        if use_batch_api:
+            # Offline type inference - results are ingested by later requests
+            logger.info(f"Submitting batch type inference for {len(placeholders)} placeholders...")
+            batch_job = submit_type_inference_batch(
+                placeholders,
+                ref_folder,
+                get_openai_client(),
+                VALIDATION_MODEL
+            )
+            if batch_job:
+                log_action(ref_folder, 'batch_submitted', status=batch_job['status'],
+                          model=VALIDATION_MODEL, batch_id=batch_job['batch_id'])
+        
+        # Synchronous inference, also the fallback when the batch submission failed
+        if batch_job is None:
+            logger.info(f"Running LLM type inference for {len(placeholders)} placeholders...")
+            enrich_placeholders_with_llm_types(
+                placeholders,
+                document_summary,
+                get_openai_client(),
+                VALIDATION_MODEL  # Use GPT-5-nano for type inference
+            )
+            logger.info("Type inference complete")
+        
+        if not owns_processing(ref_folder, started_at):
+            logger.warning(f"Processing of {ref_folder} was taken over by a retry; discarding results")
+            return
+        
+        data['document_summary'] = document_summary
+        data['batch_job'] = batch_job
+        data['validation_status'] = "batch_pending" if batch_job else "pending"
+        data['processing_status'] = "ready"
+        save_reference_json(ref_folder, data)
+        
+        log_action(ref_folder, 'processing_complete', status='ready')
+    except Exception as e:
+        logger.exception(f"Error processing document in {ref_folder}: {str(e)}")
+        
+        data = load_reference_json(ref_folder)
+        if data and data.get('processing_started_at') == started_at:
+            data['processing_status'] = "failed"
+            data['processing_error'] = str(e)
+            save_reference_json(ref_folder, data)
+
+
+def check_batch_type_inference(ref_folder, data):
+    """
+    Poll a reference's pending batch job and hand a finished one to the ingest job
+    Read-only: the reference JSON is only written by ingest_batch_type_inference
+    
+    Args:
+        ref_folder: Path to the reference folder
+        data: Reference JSON data (not modified)
+    """
+    if data.get('validation_status') not in BATCH_PENDING_STATUSES:
+        return
+    
+    batch_status = poll_batch_status(data.get('batch_job'), get_openai_client())
+    
+    # One ingest per reference across all workers (see claim_batch_ingest)
+    if is_batch_finished(batch_status) and claim_batch_ingest(ref_folder):
+        upload_executor.submit(ingest_batch_type_inference, ref_folder)
+
+
+def ingest_batch_type_inference(ref_folder):
+    """
+    Background job: write a finished batch's types into the reference JSON
+    Falls back to synchronous type inference for placeholders the batch didn't cover
+    
+    Args:
+        ref_folder: Path to the reference folder
+    """
+    try:
+        data = load_reference_json(ref_folder)
+        if not data or data.get('validation_status') not in BATCH_PENDING_STATUSES:
+            return
+        
+        data['validation_status'] = "batch_ingesting"
+        save_reference_json(ref_folder, data)
+        
+        batch_status = apply_batch_results(data, get_openai_client())
+        save_reference_json(ref_folder, data)
+        
+        log_action(ref_folder, 'batch_ingested', status=batch_status)
+    except Exception as e:
+        logger.exception(f"Error ingesting batch results in {ref_folder}: {str(e)}")
+        
+        # Leave it for a later poll to claim again
+        data = load_reference_json(ref_folder)
+        if data and data.get('validation_status') == 'batch_ingesting':
+            data['validation_status'] = "batch_pending"
+            save_reference_json(ref_folder, data)
+    finally:
+        release_batch_ingest(ref_folder)
+
+
+def owns_processing(ref_folder, started_at):
+    """Check that the reference is still being processed by the run submitted at started_at"""
+    data = load_reference_json(ref_folder)
+    return bool(data) and data.get('processing_started_at') == started_at
+
+
+def get_processing_state(data):
+    """
+    Get the effective processing status of a reference
+    A job still marked processing after PROCESSING_STALE_SECONDS was lost (the
+    in-process executor doesn't survive a worker restart), so it is reported as
+    failed and can be retried
+    
+    Args:
+        data: Reference JSON data
+    
+    Returns:
+        tuple: (processing_status, processing_error)
+    """
+    processing_status = data.get('processing_status', 'ready')
+    
+    if processing_status != 'processing':
+        return processing_status, data.get('processing_error')
+    
+    started_at = data.get('processing_started_at')
+    if started_at:
+        elapsed = (datetime.now() - datetime.fromisoformat(started_at)).total_seconds()
+        if elapsed < PROCESSING_STALE_SECONDS:
+            return processing_status, None
+    
+    return "failed", "Processing did not finish in time; retry processing"
+
+
+@app.route('/retry_processing/<int:ref_number>', methods=['POST'])
+def retry_processing(ref_number):
+    """
+    Re-run background processing (summary + type inference) after it failed
+    or after a processing job went stale (see get_processing_state)
+    
+    Args:
+        ref_number: Reference number
+    
+    Returns:
+        JSON with the new processing_status (202 once the retry is submitted)
+    """
+    try:
+        ref_folder = os.path.join(app.config['UPLOAD_FOLDER'], str(ref_number))
+        
+        if not os.path.exists(ref_folder):
+            return jsonify({'error': f'Reference {ref_number} not found'}), 404
+        
+        with processing_retry_lock:
+            data = load_reference_json(ref_folder)
+            
+            if not data:
+                return jsonify({'error': 'Failed to load reference data'}), 500
+            
+            processing_status, _ = get_processing_state(data)
+            if processing_status != 'failed':
+                return jsonify({
+                    'error': 'Document processing has not failed',
+                    'processing_status': processing_status
+                }), 409
+            
+            # Taking over a stale job: a late finish of the old run is discarded (see owns_processing)
+            started_at = datetime.now().isoformat()
+            data['processing_status'] = "processing"
+            data['processing_started_at'] = started_at
+            data.pop('processing_error', None)
+            save_reference_json(ref_folder, data)
+        
+        log_action(ref_folder, 'processing_retry', status='processing')
+        
+        # Retries use synchronous type inference; a failed batch submission is not resubmitted
+        upload_executor.submit(process_document_llm, ref_folder, False, started_at)
+        
+        return jsonify({'processing_status': 'processing'}), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/download/<ref_number>/<filename>')
 def download_file(ref_number, filename):
     """Download a processed document"""
     try:
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], ref_number, filename)
         if os.path.exists(filepath):
-            # Proper MIME type for .docx files
+            if X_ACCEL_REDIRECT_PREFIX:
+                # Let nginx stream the file so the worker returns immediately
+                return Response(headers={
+                    'X-Accel-Redirect': f"{X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(ref_number)}/{quote(filename)}",
+                    'Content-Type': DOCX_MIMETYPE,
+                    'Content-Disposition': f'attachment; filename="{filename}"'
+                })
+            
+            # Proper MIME type for .docx files; ETag/Last-Modified let repeat downloads get a 304
             return send_file(
                 filepath,
                 as_attachment=True,
                 download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+                mimetype=DOCX_MIMETYPE,
+                conditional=True,
+                etag=True
             )
         else:
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
-        print(f"Download error: {str(e)}")
+        logger.error(f"Download error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -282,8 +580,7 @@ def get_placeholder_data(ref_number, json_filename):
     try:
         json_filepath = os.path.join(app.config['UPLOAD_FOLDER'], ref_number, json_filename)
         if os.path.exists(json_filepath):
-            with open(json_filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_reference_file(json_filepath)
             return jsonify(data), 200
         else:
             return jsonify({'error': 'JSON file not found'}), 404
@@ -329,54 +626,68 @@ def list_placeholders(ref_number):
         if not data:
             return jsonify({'error': 'Failed to load reference data'}), 500
         
+        processing_status, processing_error = get_processing_state(data)
+        
+        # Summary and types are still being produced in the background; clients poll /status
+        if processing_status == 'processing':
+            return jsonify({
+                'reference_number': ref_number,
+                'processing_status': processing_status,
+                'validation_status': data.get('validation_status', 'pending')
+            }), 202
+        
+        # Start ingesting batch type inference results if the job has finished
+        check_batch_type_inference(ref_folder, data)
+        
         # Generate prompts for any placeholders with null prompt_text (lazy generation)
         document_summary = data.get('document_summary', '')
         facts_overlay_by_name = data.get('facts_overlay_by_name', {})
         placeholders = data.get('placeholders', [])
         
+        # Prompts depend on expected_type, so wait for (batch) type inference
+        if data.get('validation_status') in BATCH_PENDING_STATUSES or processing_status != 'ready':
+            pending_prompts = []
+        else:
+            pending_prompts = [p for p in placeholders if p.get('prompt_text') is None]
+        
         prompts_generated = 0
-        for placeholder in placeholders:
-            if placeholder.get('prompt_text') is None:
-                # Lazy prompt generation with caching
-                was_generated = update_prompt_cache(
-                    placeholder,
-                    document_summary,
-                    openai_client,
-                    QA_MODEL
-                )
+        if pending_prompts:
+            # Prompt generation is network-bound, so fan out across threads
+            with ThreadPoolExecutor(max_workers=PROMPT_GENERATION_WORKERS) as executor:
+                futures = {
+                    executor.submit(
+                        update_prompt_cache,
+                        placeholder,
+                        document_summary,
+                        get_openai_client(),
+                        QA_MODEL,
+                        cache_path=LLM_CACHE_FILE
+                    ): placeholder
+                    for placeholder in pending_prompts
+                }
                 
-                if was_generated:
-                    prompts_generated += 1
-                    
-                    # Log prompt generation
-                    log_action(
-                        ref_folder,
-                        'prompt_generated',
-                        placeholder_id=placeholder['placeholder_id'],
-                        model=QA_MODEL
-                    )
+                for future in as_completed(futures):
+                    if future.result():
+                        prompts_generated += 1
+                        
+                        # Log prompt generation
+                        log_action(
+                            ref_folder,
+                            'prompt_generated',
+                            placeholder_id=futures[future]['placeholder_id'],
+                            model=QA_MODEL
+                        )
         
         # Save JSON if prompts were generated
         if prompts_generated > 0:
             save_reference_json(ref_folder, data)
-            print(f"✓ Generated {prompts_generated} prompts for reference {ref_number}")
-        
-        # Calculate progress
-        status_counts = {
-            'filled': 0,
-            'auto_filled': 0,
-            'pending': 0,
-            'skipped': 0
-        }
-        
-        for placeholder in placeholders:
-            status = placeholder.get('status', 'pending')
-            if status in status_counts:
-                status_counts[status] += 1
+            logger.info(f"✓ Generated {prompts_generated} prompts for reference {ref_number}")
         
-        # Prepare response (return minimal placeholder info)
+        # Calculate progress and prepare response (minimal placeholder info) in one pass
+        status_counts = Counter()
         simplified_placeholders = []
         for p in placeholders:
+            status_counts[p.get('status', 'pending')] += 1
             simplified_placeholders.append({
                 'placeholder_id': p['placeholder_id'],
                 'placeholder_name': p['placeholder_name'],
@@ -393,13 +704,9 @@ def list_placeholders(ref_number):
             'document_summary': document_summary,
             'truncated': data.get('truncated', False),
             'validation_status': data.get('validation_status', 'pending'),
-            'progress': {
-                'filled': status_counts['filled'],
-                'auto_filled': status_counts['auto_filled'],
-                'pending': status_counts['pending'],
-                'skipped': status_counts['skipped'],
-                'total': len(placeholders)
-            },
+            'processing_status': processing_status,
+            'processing_error': processing_error,
+            'progress': build_progress(status_counts, len(placeholders)),
             'placeholders': simplified_placeholders
         }
         
@@ -439,6 +746,18 @@ def fill_placeholder(ref_number, placeholder_id):
         if not data:
             return jsonify({'error': 'Failed to load reference data'}), 500
         
+        processing_status, _ = get_processing_state(data)
+        
+        if processing_status == 'processing':
+            return jsonify({'error': 'Document is still being processed'}), 409
+        
+        if processing_status == 'failed':
+            return jsonify({'error': 'Document processing failed; retry processing first'}), 409
+        
+        # Validation depends on expected_type, which the batch job hasn't produced yet
+        if data.get('validation_status') in BATCH_PENDING_STATUSES:
+            return jsonify({'error': 'Type inference is still running'}), 409
+        
         # Get placeholder
         placeholder = get_placeholder_by_id(data, placeholder_id)
         
@@ -472,13 +791,27 @@ def fill_placeholder(ref_number, placeholder_id):
         document_summary = data.get('document_summary', '')
         facts_overlay_by_name = data.get('facts_overlay_by_name', {})
         
+        # On the auto-fill path, start the suggestion while validation runs
+        # (discarded if validation passes) to save a full LLM round-trip
+        suggestion_future = None
+        if current_attempts == 2 and consent_auto_suggest:
+            suggestion_future = llm_executor.submit(
+                auto_suggest_value,
+                placeholder,
+                document_summary,
+                facts_overlay_by_name,
+                get_openai_client(),
+                QA_MODEL
+            )
+        
         # LLM-only validation (NO local validation - LLM is smarter)
         llm_result = validate_with_llm_v2(
             user_input,
             placeholder,
             document_summary,
-            openai_client,
-            VALIDATION_MODEL
+            get_openai_client(),
+            VALIDATION_MODEL,
+            cache_path=LLM_CACHE_FILE
         )
         
         log_action(ref_folder, 'validated_llm', placeholder_id=placeholder_id, 
@@ -499,7 +832,7 @@ def fill_placeholder(ref_number, placeholder_id):
             update_facts_overlay(data, placeholder_id, placeholder_name, normalized)
             
             # Save JSON
-            save_reference_json(ref_folder, data)
+            save_placeholder_update(ref_folder, data, placeholder_id)
             
             return jsonify({
                 'status': 'accepted',
@@ -510,7 +843,7 @@ def fill_placeholder(ref_number, placeholder_id):
         # Check attempts threshold (FIXED: stop at exactly 2)
         if current_attempts < 2:
             # Not enough attempts yet, just reject with hint
-            save_reference_json(ref_folder, data)
+            save_placeholder_update(ref_folder, data, placeholder_id)
             
             return jsonify({
                 'status': 'rejected',
@@ -521,7 +854,7 @@ def fill_placeholder(ref_number, placeholder_id):
         # attempts == 2: Offer auto-suggest ONCE
         if not consent_auto_suggest:
             # First time at threshold, offer auto-suggest
-            save_reference_json(ref_folder, data)
+            save_placeholder_update(ref_folder, data, placeholder_id)
             
             return jsonify({
                 'status': 'offer_auto_suggest',
@@ -531,7 +864,7 @@ def fill_placeholder(ref_number, placeholder_id):
         
         # User declined or attempts > 2: STOP offering, just reject
         if current_attempts > 2:
-            save_reference_json(ref_folder, data)
+            save_placeholder_update(ref_folder, data, placeholder_id)
             
             return jsonify({
                 'status': 'rejected',
@@ -542,14 +875,8 @@ def fill_placeholder(ref_number, placeholder_id):
         # Step: User consented to auto-suggest, perform auto-fill
         # user_input_raw already contains the first meaningful attempt (set earlier)
         # Don't overwrite it with the latest input
-        
-        suggested_value = auto_suggest_value(
-            placeholder,
-            document_summary,
-            facts_overlay_by_name,
-            openai_client,
-            QA_MODEL
-        )
+        # The suggestion was started alongside validation above
+        suggested_value = suggestion_future.result()
         
         # Normalize the suggested value (using v2 - respects extracted values)
         normalized = normalize_value_v2(suggested_value, expected_type)
@@ -563,7 +890,7 @@ def fill_placeholder(ref_number, placeholder_id):
         update_facts_overlay(data, placeholder_id, placeholder_name, normalized)
         
         # Save JSON
-        save_reference_json(ref_folder, data)
+        save_placeholder_update(ref_folder, data, placeholder_id)
         
         # Log action
         log_action(ref_folder, 'auto_filled', placeholder_id=placeholder_id, model=QA_MODEL)
@@ -574,9 +901,7 @@ def fill_placeholder(ref_number, placeholder_id):
         }), 200
         
     except Exception as e:
-        print(f"Error in fill_placeholder: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error in fill_placeholder: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -604,6 +929,11 @@ def undo_placeholder(ref_number, placeholder_id):
         if not data:
             return jsonify({'error': 'Failed to load reference data'}), 500
         
+        # Background processing rewrites the whole JSON when it finishes (a stale
+        # job may still finish, so this uses the raw status; retry takes it over)
+        if data.get('processing_status') == 'processing':
+            return jsonify({'error': 'Document is still being processed'}), 409
+        
         # Get placeholder
         placeholder = get_placeholder_by_id(data, placeholder_id)
         
@@ -623,13 +953,15 @@ def undo_placeholder(ref_number, placeholder_id):
             del data['facts_overlay'][placeholder_id]
         
         # Check if any other placeholder with same name is filled
-        other_filled = False
-        for p in data.get('placeholders', []):
-            if (p['placeholder_id'] != placeholder_id and 
-                p['placeholder_name'] == placeholder_name and 
-                p.get('status') in ['filled', 'auto_filled']):
-                other_filled = True
-                break
+        if 'name_to_ids' in data:
+            same_name = (get_placeholder_by_id(data, other_id) for other_id in data['name_to_ids'].get(placeholder_name, []))
+        else:
+            same_name = (p for p in data.get('placeholders', []) if p['placeholder_name'] == placeholder_name)
+        
+        other_filled = any(
+            p['placeholder_id'] != placeholder_id and p.get('status') in ['filled', 'auto_filled']
+            for p in same_name
+        )
         
         # Only remove from facts_overlay_by_name if no other instance is filled
         if not other_filled:
@@ -637,34 +969,18 @@ def undo_placeholder(ref_number, placeholder_id):
                 del data['facts_overlay_by_name'][placeholder_name]
         
         # Save JSON
-        save_reference_json(ref_folder, data)
+        save_placeholder_update(ref_folder, data, placeholder_id)
         
         # Log action
         log_action(ref_folder, 'undo', placeholder_id=placeholder_id)
         
         # Calculate updated progress
-        status_counts = {
-            'filled': 0,
-            'auto_filled': 0,
-            'pending': 0,
-            'skipped': 0
-        }
-        
-        for p in data.get('placeholders', []):
-            status = p.get('status', 'pending')
-            if status in status_counts:
-                status_counts[status] += 1
+        status_counts = Counter(p.get('status', 'pending') for p in data.get('placeholders', []))
         
         return jsonify({
             'success': True,
             'message': f'Placeholder {placeholder_id} reset to pending',
-            'progress': {
-                'filled': status_counts['filled'],
-                'auto_filled': status_counts['auto_filled'],
-                'pending': status_counts['pending'],
-                'skipped': status_counts['skipped'],
-                'total': len(data.get('placeholders', []))
-            }
+            'progress': build_progress(status_counts, len(data.get('placeholders', [])))
         }), 200
         
     except Exception as e:
@@ -689,28 +1005,26 @@ def get_status(ref_number):
         if not os.path.exists(ref_folder):
             return jsonify({'error': f'Reference {ref_number} not found'}), 404
         
-        data = load_reference_json(ref_folder)
+        # Status polls are read-only, so use the shared cached copy
+        data = load_reference_json_cached(ref_folder)
         
         if not data:
             return jsonify({'error': 'Failed to load reference data'}), 500
         
+        # Start ingesting batch type inference results if the job has finished
+        check_batch_type_inference(ref_folder, data)
+        
         placeholders = data.get('placeholders', [])
+        processing_status, processing_error = get_processing_state(data)
         
         # Calculate progress
-        status_counts = {
-            'filled': 0,
-            'auto_filled': 0,
-            'pending': 0,
-            'skipped': 0
-        }
-        
+        status_counts = Counter()
         pending_ordered = []
         next_pending_id = None
         
         for p in placeholders:
             status = p.get('status', 'pending')
-            if status in status_counts:
-                status_counts[status] += 1
+            status_counts[status] += 1
             
             # Collect pending IDs in document order
             if status == 'pending':
@@ -719,13 +1033,10 @@ def get_status(ref_number):
                     next_pending_id = p['placeholder_id']
         
         return jsonify({
-            'progress': {
-                'filled': status_counts['filled'],
-                'auto_filled': status_counts['auto_filled'],
-                'pending': status_counts['pending'],
-                'skipped': status_counts['skipped'],
-                'total': len(placeholders)
-            },
+            'progress': build_progress(status_counts, len(placeholders)),
+            'validation_status': data.get('validation_status', 'pending'),
+            'processing_status': processing_status,
+            'processing_error': processing_error,
             'next_pending_id': next_pending_id,
             'pending_ordered': pending_ordered
         }), 200
@@ -752,15 +1063,18 @@ def preview_document(ref_number):
         if not os.path.exists(ref_folder):
             return jsonify({'error': f'Reference {ref_number} not found'}), 404
         
-        data = load_reference_json(ref_folder)
+        # Read-only view, so use the shared cached copy
+        data = load_reference_json_cached(ref_folder)
         
         if not data:
             return jsonify({'error': 'Failed to load reference data'}), 500
         
-        # Build preview list
+        # Build preview list and calculate progress in one pass
+        status_counts = Counter()
         placeholders_preview = []
         
         for p in data.get('placeholders', []):
+            status_counts[p.get('status', 'pending')] += 1
             placeholders_preview.append({
                 'id': p['placeholder_id'],
                 'name': p['placeholder_name'],
@@ -770,30 +1084,11 @@ def preview_document(ref_number):
                 'attempts': p.get('attempts', 0)
             })
         
-        # Calculate progress
-        status_counts = {
-            'filled': 0,
-            'auto_filled': 0,
-            'pending': 0,
-            'skipped': 0
-        }
-        
-        for p in data.get('placeholders', []):
-            status = p.get('status', 'pending')
-            if status in status_counts:
-                status_counts[status] += 1
-        
         return jsonify({
             'reference_number': ref_number,
             'document_summary': data.get('document_summary', ''),
             'validation_status': data.get('validation_status', 'pending'),
-            'progress': {
-                'filled': status_counts['filled'],
-                'auto_filled': status_counts['auto_filled'],
-                'pending': status_counts['pending'],
-                'skipped': status_counts['skipped'],
-                'total': len(data.get('placeholders', []))
-            },
+            'progress': build_progress(status_counts, len(data.get('placeholders', []))),
             'placeholders_preview': placeholders_preview
         }), 200
         
@@ -812,7 +1107,6 @@ def generate_final_document(ref_number):
     Returns:
         JSON with download link to final document
     """
-    import time
     start_time = time.time()
     
     try:
@@ -860,7 +1154,7 @@ def generate_final_document(ref_number):
         final_doc_path = os.path.join(ref_folder, final_filename)
         
         # Replace placeholders
-        print(f"Generating final document for reference {ref_number}...")
+        logger.info(f"Generating final document for reference {ref_number}...")
         result = replace_placeholders_in_document(
             marked_doc_path,
             placeholders,
@@ -892,8 +1186,8 @@ def generate_final_document(ref_number):
             has_auto_filled=has_auto_filled
         )
         
-        print(f"✓ Final document generated: {final_filename}")
-        print(f"✓ Made {result['replacements']} replacements")
+        logger.info(f"✓ Final document generated: {final_filename}")
+        logger.info(f"✓ Made {result['replacements']} replacements")
         
         return jsonify({
             'status': 'ok',
@@ -904,9 +1198,7 @@ def generate_final_document(ref_number):
         }), 200
         
     except Exception as e:
-        print(f"Error generating final document: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error generating final document: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -3,45 +3,32 @@ Auto-fill utilities
 Handles AI-powered auto-suggestion for placeholders after validation failures
 """
 
+import logging
+import re
+
 from utils.prompt_utils import load_prompt_template, render_prompt_template
 from utils.format_utils import format_facts_for_prompt
 
+logger = logging.getLogger(__name__)
+
+# Common placeholder patterns, compiled once as a single alternation
+# ({.*?} already covers {{Something}})
+PLACEHOLDER_PATTERN_RE = re.compile(
+    r'\[.*?\]'            # [Something]
+    r'|\{.*?\}'           # {Something} / {{Something}}
+    r'|^\[?[A-Z_\s]+\]?$' # ALL_CAPS or [ALL CAPS]
+)
+
+# Without '[', ']' or '{' only the ALL_CAPS alternative can match
+ALL_CAPS_RE = re.compile(r'^[A-Z_\s]+$')
 
-def auto_suggest_value(placeholder, document_summary, facts_overlay_by_name, openai_client, model):
-    """
-    Use LLM to auto-suggest a plausible value based on context
-    
-    Args:
-        placeholder: Placeholder dictionary
-        document_summary: Document summary
-        facts_overlay_by_name: Facts already filled
-        openai_client: OpenAI client
-        model: QA model (gpt-4o-mini)
-    
-    Returns:
-        str: Suggested value
-    """
-    expected_type = placeholder.get('expected_type', 'text')
-    placeholder_name = placeholder['placeholder_name']
-    context_before = placeholder['context_before']
-    context_after = placeholder['context_after']
-    prompt_text = placeholder.get('prompt_text', f"Please provide {placeholder_name}")
-    
-    # Get previous user attempts if available
-    user_input_raw = placeholder.get('user_input_raw')
-    attempts_context = ""
-    if user_input_raw and user_input_raw != '(auto)':
-        attempts_context = f"\n\nUser's previous attempt: \"{user_input_raw}\"\n(This was rejected, but might contain useful hints about what the value should be. Extract any useful information from it.)\n"
-    
-    # Format facts
-    facts_text = format_facts_for_prompt(facts_overlay_by_name)
-    
-    # Build auto-suggest prompt - use the question we asked the user!
-    prompt = f"""You are helping fill in a legal document. The user was asked this question but couldn't answer it:
 
-QUESTION: {prompt_text}
-{attempts_context}
-Based on the context below, suggest a REALISTIC and PLAUSIBLE value. DO NOT return placeholders like [Company Name] or {{Name}}.
+# Invariant parts of the auto-suggest prompt, built once at import
+AUTO_SUGGEST_PROMPT_HEADER = """You are helping fill in a legal document. The user was asked this question but couldn't answer it:
+
+QUESTION: """
+
+AUTO_SUGGEST_PROMPT_RULES = """Based on the context below, suggest a REALISTIC and PLAUSIBLE value. DO NOT return placeholders like [Company Name] or {Name}.
 
 CRITICAL PRIORITY RULES (READ CAREFULLY):
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -59,21 +46,13 @@ CRITICAL PRIORITY RULES (READ CAREFULLY):
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 Document Summary:
-{document_summary}
-
-Facts already filled (OTHER fields - for reference only):
-{facts_text}
-
-Placeholder field we're filling NOW: {placeholder_name}
-Expected type: {expected_type}
+"""
 
-Context from document:
-BEFORE: ...{context_before[-200:] if len(context_before) > 200 else context_before}
-AFTER: {context_after[:200] if len(context_after) > 200 else context_after}...
+AUTO_SUGGEST_PROMPT_GUIDELINES = """...
 
 FORMAT GUIDELINES:
 - Provide ONLY a realistic value, no explanation
-- DO NOT return placeholders like [Company Name], {{{{Name}}}}, [PLACEHOLDER], etc.
+- DO NOT return placeholders like [Company Name], {{Name}}, [PLACEHOLDER], etc.
 - Match the expected type:
   - date: YYYY-MM-DD format (e.g., 2025-05-15)
   - monetary_value: numeric only (e.g., 50000 or 1000000)
@@ -83,6 +62,54 @@ FORMAT GUIDELINES:
 
 Suggested value (extract from user's attempt if present):"""
 
+
+def auto_suggest_value(placeholder, document_summary, facts_overlay_by_name, openai_client, model):
+    """
+    Use LLM to auto-suggest a plausible value based on context
+    
+    Args:
+        placeholder: Placeholder dictionary
+        document_summary: Document summary
+        facts_overlay_by_name: Facts already filled
+        openai_client: OpenAI client
+        model: QA model (gpt-4o-mini)
+    
+    Returns:
+        str: Suggested value
+    """
+    expected_type = placeholder.get('expected_type', 'text')
+    placeholder_name = placeholder['placeholder_name']
+    context_before = placeholder['context_before']
+    context_after = placeholder['context_after']
+    prompt_text = placeholder.get('prompt_text', f"Please provide {placeholder_name}")
+    
+    # Get previous user attempts if available
+    user_input_raw = placeholder.get('user_input_raw')
+    attempts_context = ""
+    if user_input_raw and user_input_raw != '(auto)':
+        attempts_context = f"\n\nUser's previous attempt: \"{user_input_raw}\"\n(This was rejected, but might contain useful hints about what the value should be. Extract any useful information from it.)\n"
+    
+    # Format facts
+    facts_text = format_facts_for_prompt(facts_overlay_by_name)
+    
+    before_text = context_before[-200:] if len(context_before) > 200 else context_before
+    after_text = context_after[:200] if len(context_after) > 200 else context_after
+    
+    # Build auto-suggest prompt - use the question we asked the user!
+    prompt = ''.join([
+        AUTO_SUGGEST_PROMPT_HEADER,
+        f"{prompt_text}\n{attempts_context}\n",
+        AUTO_SUGGEST_PROMPT_RULES,
+        f"{document_summary}\n\n"
+        f"Facts already filled (OTHER fields - for reference only):\n{facts_text}\n\n"
+        f"Placeholder field we're filling NOW: {placeholder_name}\n"
+        f"Expected type: {expected_type}\n\n"
+        f"Context from document:\n"
+        f"BEFORE: ...{before_text}\n"
+        f"AFTER: {after_text}",
+        AUTO_SUGGEST_PROMPT_GUIDELINES
+    ])
+
     try:
         response = openai_client.chat.completions.create(
             model=model,
@@ -98,7 +125,7 @@ Suggested value (extract from user's attempt if present):"""
         
         # Check if it's still a placeholder pattern
         if is_placeholder_pattern(suggested):
-            print(f"Warning: LLM returned a placeholder: {suggested}")
+            logger.warning(f"LLM returned a placeholder: {suggested}")
             return get_default_value(expected_type, placeholder_name)
         
         # If unknown or empty
@@ -108,27 +135,16 @@ Suggested value (extract from user's attempt if present):"""
         return suggested
         
     except Exception as e:
-        print(f"Error in auto-suggest: {str(e)}")
+        logger.error(f"Error in auto-suggest: {str(e)}")
         return get_default_value(expected_type, placeholder_name)
 
 
 def is_placeholder_pattern(text):
     """Check if text looks like a placeholder"""
-    import re
-    
-    # Check for common placeholder patterns
-    patterns = [
-        r'\[.*?\]',           # [Something]
-        r'\{\{.*?\}\}',       # {{Something}}
-        r'\{.*?\}',           # {Something}
-        r'^\[?[A-Z_\s]+\]?$', # ALL_CAPS or [ALL CAPS]
-    ]
-    
-    for pattern in patterns:
-        if re.search(pattern, text):
-            return True
-    
-    return False
+    # Fast path for the common plain-value reply
+    if '[' not in text and ']' not in text and '{' not in text:
+        return ALL_CAPS_RE.search(text) is not None
+    return PLACEHOLDER_PATTERN_RE.search(text) is not None
 
 
 def get_default_value(expected_type, placeholder_name=''):
@@ -0,0 +1,258 @@
+"""
+OpenAI Batch API utilities
+Handles offline type inference for bulk uploads (submission and result ingestion)
+
+Polling is read-only; the results of a finished job are ingested once, by
+whichever worker claims it (see claim_batch_ingest)
+"""
+
+import logging
+import os
+import threading
+import time
+import orjson
+from datetime import datetime
+
+from utils.llm_type_inference import (
+    build_type_inference_prompt,
+    parse_inferred_type,
+    assign_priority,
+    enrich_placeholders_with_llm_types
+)
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+BATCH_COMPLETION_WINDOW = '24h'
+BATCH_FAILED_STATUSES = {'failed', 'expired', 'cancelled'}
+BATCH_POLL_INTERVAL = 30  # Minimum seconds between batches.retrieve calls for one job (per process)
+BATCH_INGEST_MARKER = 'type_inference_batch.ingesting'  # Exists while one worker ingests the results
+BATCH_INGEST_STALE_SECONDS = 900  # An older marker is left over from a crashed ingest
+BATCH_PENDING_STATUSES = {'batch_pending', 'batch_ingesting'}  # validation_status values before types exist
+
+# batch_id -> time.monotonic() of the last batches.retrieve call
+_last_batch_check = {}
+_last_batch_check_lock = threading.Lock()
+
+
+def _should_poll_batch(batch_id):
+    """Return True (and record the check) if the batch hasn't been polled recently"""
+    now = time.monotonic()
+    with _last_batch_check_lock:
+        last_check = _last_batch_check.get(batch_id)
+        if last_check is not None and now - last_check < BATCH_POLL_INTERVAL:
+            return False
+        _last_batch_check[batch_id] = now
+        return True
+
+
+def submit_type_inference_batch(placeholders, ref_folder, openai_client, model):
+    """
+    Submit type inference for all placeholders as an OpenAI batch job
+    Writes one JSONL request per placeholder, keyed by placeholder_id
+
+    Args:
+        placeholders: List of placeholder dictionaries
+        ref_folder: Path to the reference folder (JSONL input is kept here)
+        openai_client: OpenAI client
+        model: Model to use for type inference
+
+    Returns:
+        dict: Batch job metadata to store in the reference JSON, or None if the
+            submission failed (callers fall back to synchronous type inference)
+    """
+    input_path = os.path.join(ref_folder, 'type_inference_batch.jsonl')
+
+    with open(input_path, 'wb') as f:
+        for placeholder in placeholders:
+            request_line = {
+                "custom_id": placeholder['placeholder_id'],
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": [{
+                        "role": "user",
+                        "content": build_type_inference_prompt(
+                            placeholder['placeholder_name'],
+                            placeholder['context_before'],
+                            placeholder['context_after']
+                        )
+                    }],
+                    "temperature": 0.1,
+                    "max_tokens": 20
+                }
+            }
+            f.write(orjson.dumps(request_line) + b'\n')
+
+    try:
+        with open(input_path, 'rb') as f:
+            input_file = openai_client.files.create(file=f, purpose='batch')
+
+        batch = openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW
+        )
+    except Exception as e:
+        logger.error(f"Error submitting type inference batch for {ref_folder}: {str(e)}")
+        return None
+
+    return {
+        "batch_id": batch.id,
+        "input_file_id": input_file.id,
+        "model": model,
+        "status": batch.status,
+        "submitted_at": datetime.now().isoformat()
+    }
+
+
+def parse_batch_output(output_text):
+    """
+    Parse Batch API output JSONL into inferred types
+
+    Args:
+        output_text: Contents of the batch output file
+
+    Returns:
+        dict: {placeholder_id: expected_type} for successful requests
+    """
+    inferred = {}
+
+    for line in output_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            entry = orjson.loads(line)
+            response = entry.get('response') or {}
+            if response.get('status_code') != 200:
+                continue
+            content = response['body']['choices'][0]['message']['content']
+            inferred[entry['custom_id']] = parse_inferred_type(content)
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError):
+            continue
+
+    return inferred
+
+
+def poll_batch_status(batch_job, openai_client):
+    """
+    Look up the current status of a batch job (read-only)
+    Each job is polled at most once per BATCH_POLL_INTERVAL
+
+    Args:
+        batch_job: Batch job metadata from the reference JSON
+        openai_client: OpenAI client
+
+    Returns:
+        str: Batch status, or None if it wasn't polled (throttled or error)
+    """
+    if not batch_job or not _should_poll_batch(batch_job['batch_id']):
+        return None
+
+    try:
+        return openai_client.batches.retrieve(batch_job['batch_id']).status
+    except Exception as e:
+        logger.error(f"Error polling batch {batch_job['batch_id']}: {str(e)}")
+        return None
+
+
+def is_batch_finished(batch_status):
+    """Check whether a batch status is terminal (results can be ingested)"""
+    return batch_status == 'completed' or batch_status in BATCH_FAILED_STATUSES
+
+
+def _ingest_marker_path(ref_folder):
+    """Path of the file that marks a batch ingest as claimed"""
+    return os.path.join(ref_folder, BATCH_INGEST_MARKER)
+
+
+def claim_batch_ingest(ref_folder):
+    """
+    Claim the ingest of a reference's finished batch
+    The marker file is created exclusively, so only one worker process wins;
+    a marker older than BATCH_INGEST_STALE_SECONDS (crashed ingest) is taken over
+
+    Args:
+        ref_folder: Path to the reference folder
+
+    Returns:
+        bool: True if this caller should run the ingest
+    """
+    marker_path = _ingest_marker_path(ref_folder)
+
+    try:
+        if time.time() - os.path.getmtime(marker_path) > BATCH_INGEST_STALE_SECONDS:
+            os.unlink(marker_path)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.close(os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+
+    return True
+
+
+def release_batch_ingest(ref_folder):
+    """Release a claim taken with claim_batch_ingest"""
+    try:
+        os.unlink(_ingest_marker_path(ref_folder))
+    except FileNotFoundError:
+        pass
+
+
+def apply_batch_results(data, openai_client):
+    """
+    Write a finished batch job's results back into the reference data
+    Placeholders missing from the output are inferred synchronously; if the
+    job failed or expired, all placeholders are inferred synchronously
+
+    Args:
+        data: Reference JSON data (modified in place)
+        openai_client: OpenAI client
+
+    Returns:
+        str: Final batch status
+    """
+    batch_job = data['batch_job']
+    batch = openai_client.batches.retrieve(batch_job['batch_id'])
+
+    inferred = {}
+    if batch.status == 'completed' and batch.output_file_id:
+        try:
+            inferred = parse_batch_output(openai_client.files.content(batch.output_file_id).text)
+        except Exception as e:
+            logger.error(f"Error reading batch output {batch.output_file_id}: {str(e)}")
+
+    placeholders = data.get('placeholders', [])
+    missing = []
+
+    for placeholder in placeholders:
+        expected_type = inferred.get(placeholder['placeholder_id'])
+        if expected_type is None:
+            missing.append(placeholder)
+            continue
+        placeholder['expected_type'] = expected_type
+        placeholder['priority'] = assign_priority(expected_type)
+
+    if missing:
+        enrich_placeholders_with_llm_types(
+            missing,
+            data.get('document_summary', ''),
+            openai_client,
+            batch_job['model']
+        )
+
+    batch_job['status'] = batch.status
+    batch_job['completed_at'] = datetime.now().isoformat()
+    data['validation_status'] = 'pending'
+
+    with _last_batch_check_lock:
+        _last_batch_check.pop(batch_job['batch_id'], None)
+
+    return batch.status
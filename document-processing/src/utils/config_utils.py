@@ -3,14 +3,49 @@ Configuration loading utilities
 Loads models, type mappings, validation rules, and other config files
 """
 
+import logging
 import os
 import json
 
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config')
+
+# Parsed config files keyed by path, reused while the file's mtime is unchanged
+_config_cache = {}
+
 
 def get_config_path(filename):
     """Get absolute path to a config file"""
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    return os.path.join(base_dir, 'config', filename)
+    return os.path.join(CONFIG_DIR, filename)
+
+
+def read_config_json(config_path):
+    """
+    Parse a config JSON file, reusing the previous parse until the file changes
+    The returned data is shared between callers and must be treated as read-only
+    
+    Args:
+        config_path: Absolute path to the config file
+    
+    Returns:
+        dict: Parsed config, or None if the file does not exist
+    """
+    try:
+        mtime_ns = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        _config_cache.pop(config_path, None)
+        return None
+    
+    cached = _config_cache.get(config_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    _config_cache[config_path] = (mtime_ns, config)
+    return config
 
 
 def load_models_config():
@@ -33,14 +68,13 @@ def load_models_config():
     }
     
     try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # Merge with defaults
-                return {**defaults, **config}
+        config = read_config_json(config_path)
+        if config is not None:
+            # Merge with defaults
+            return {**defaults, **config}
         return defaults
     except Exception as e:
-        print(f"Error loading models config: {str(e)}")
+        logger.error(f"Error loading models config: {str(e)}")
         return defaults
 
 
@@ -54,12 +88,12 @@ def load_type_map_config():
     config_path = get_config_path('expected_type_map.json')
     
     try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        config = read_config_json(config_path)
+        if config is not None:
+            return config
         return {"types": {}, "fallback_order": []}
     except Exception as e:
-        print(f"Error loading type map config: {str(e)}")
+        logger.error(f"Error loading type map config: {str(e)}")
         return {"types": {}, "fallback_order": []}
 
 
@@ -73,12 +107,12 @@ def load_validation_rules_config():
     config_path = get_config_path('validation_rules.json')
     
     try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        config = read_config_json(config_path)
+        if config is not None:
+            return config
         return {}
     except Exception as e:
-        print(f"Error loading validation rules config: {str(e)}")
+        logger.error(f"Error loading validation rules config: {str(e)}")
         return {}
 
 
@@ -103,12 +137,12 @@ def load_placeholder_patterns_config():
     }
     
     try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        config = read_config_json(config_path)
+        if config is not None:
+            return config
         return defaults
     except Exception as e:
-        print(f"Error loading placeholder patterns config: {str(e)}")
+        logger.error(f"Error loading placeholder patterns config: {str(e)}")
         return defaults
 
 
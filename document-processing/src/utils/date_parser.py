@@ -0,0 +1,53 @@
+"""
+Fast date parsing for date placeholders
+Tries common formats with strptime before falling back to dateutil
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from dateutil import parser as dateutil_parser
+
+
+# Common formats tried in order; month-first before day-first, matching dateutil's default
+FAST_DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%m-%d-%Y',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%B %d, %Y',
+    '%d %B %Y',
+    '%b %d, %Y',
+    '%d %b %Y',
+)
+
+
+@lru_cache(maxsize=1024)
+def parse_date_input(user_input):
+    """
+    Parse a date string, equivalent to dateutil_parser.parse(user_input, fuzzy=False)
+    
+    Args:
+        user_input: Date string
+    
+    Returns:
+        datetime: Parsed date, or None if it can't be parsed
+    """
+    # dateutil ignores surrounding whitespace; strptime does not
+    candidate = user_input.strip() if isinstance(user_input, str) else ''
+    
+    for date_format in FAST_DATE_FORMATS:
+        try:
+            parsed_date = datetime.strptime(candidate, date_format)
+        except ValueError:
+            continue
+        
+        # dateutil reads years below 100 as two-digit years, so let it decide those
+        if parsed_date.year >= 100:
+            return parsed_date
+        break
+    
+    try:
+        return dateutil_parser.parse(user_input, fuzzy=False)
+    except (ValueError, TypeError, OverflowError):
+        return None
@@ -3,8 +3,57 @@ Final document generation utilities
 Handles replacement of placeholder markers with actual values
 """
 
-from docx import Document
 import re
+from itertools import chain
+
+
+def _replace_markers_in_paragraph(paragraph, replacement_map, marker_regex, found_markers):
+    """
+    Replace placeholder markers in one paragraph, preferring run-level replacement
+    run.text is rebuilt from the XML on every access, so the runs and their texts
+    are read once and tracked locally (paragraph.text is never needed)
+    
+    Args:
+        paragraph: python-docx Paragraph
+        replacement_map: {marker: value}
+        marker_regex: Compiled alternation of every marker
+        found_markers: Set updated with each marker replaced
+    
+    Returns:
+        int: Number of replacements made
+    """
+    # Read the runs once; their joined text is what can actually be replaced
+    runs = paragraph.runs
+    run_texts = [run.text for run in runs]
+    
+    if not marker_regex.search(''.join(run_texts)):
+        return 0
+    
+    replacements_made = 0
+    
+    def substitute(match):
+        nonlocal replacements_made
+        replacements_made += 1
+        found_markers.add(match.group(0))
+        return replacement_map[match.group(0)]
+    
+    # Replace within runs to preserve formatting (one regex pass per run)
+    for i, run in enumerate(runs):
+        new_text = marker_regex.sub(substitute, run_texts[i])
+        if new_text != run_texts[i]:
+            run.text = new_text
+            run_texts[i] = new_text
+    
+    # Markers split across runs are still present in the joined text: rebuild the paragraph
+    paragraph_text = ''.join(run_texts)
+    new_text = marker_regex.sub(substitute, paragraph_text)
+    if new_text != paragraph_text:
+        # Clear existing runs and put the new text in the first run
+        for run in runs:
+            run.text = ''
+        runs[0].text = new_text
+    
+    return replacements_made
 
 
 def replace_placeholders_in_document(marked_doc_path, placeholders, output_path):
@@ -19,6 +68,8 @@ def replace_placeholders_in_document(marked_doc_path, placeholders, output_path)
     Returns:
         dict: {'success': bool, 'replacements': int, 'errors': list}
     """
+    from docx import Document
+    
     try:
         doc = Document(marked_doc_path)
         
@@ -38,64 +89,29 @@ def replace_placeholders_in_document(marked_doc_path, placeholders, output_path)
         replacements_made = 0
         errors = []
         
-        # Replace in paragraphs
-        for paragraph in doc.paragraphs:
-            paragraph_text = paragraph.text
-            
-            for marker, value in replacement_map.items():
-                if marker in paragraph_text:
-                    # Replace in runs to preserve formatting
-                    replaced = False
-                    
-                    # Try to find and replace within runs
-                    for run in paragraph.runs:
-                        if marker in run.text:
-                            run.text = run.text.replace(marker, value)
-                            replacements_made += 1
-                            replaced = True
-                    
-                    # If not found in individual runs, might be split across runs
-                    if not replaced and marker in paragraph_text:
-                        # Rebuild paragraph text
-                        new_text = paragraph_text.replace(marker, value)
-                        # Clear existing runs
-                        for run in paragraph.runs:
-                            run.text = ''
-                        # Add new text to first run
-                        if paragraph.runs:
-                            paragraph.runs[0].text = new_text
-                        else:
-                            paragraph.add_run(new_text)
-                        replacements_made += 1
+        # All markers in one alternation: a paragraph or run is scanned once, not once per marker
+        marker_regex = re.compile('|'.join(map(re.escape, replacement_map))) if replacement_map else None
         
-        # Replace in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        paragraph_text = paragraph.text
-                        
-                        for marker, value in replacement_map.items():
-                            if marker in paragraph_text:
-                                # Replace in runs
-                                replaced = False
-                                
-                                for run in paragraph.runs:
-                                    if marker in run.text:
-                                        run.text = run.text.replace(marker, value)
-                                        replacements_made += 1
-                                        replaced = True
-                                
-                                # If not found in individual runs
-                                if not replaced and marker in paragraph_text:
-                                    new_text = paragraph_text.replace(marker, value)
-                                    for run in paragraph.runs:
-                                        run.text = ''
-                                    if paragraph.runs:
-                                        paragraph.runs[0].text = new_text
-                                    else:
-                                        paragraph.add_run(new_text)
-                                    replacements_made += 1
+        if marker_regex is not None:
+            found_markers = set()
+            
+            # Paragraphs first, then table cells (walked lazily)
+            table_paragraphs = (
+                paragraph
+                for table in doc.tables
+                for row in table.rows
+                for cell in row.cells
+                for paragraph in cell.paragraphs
+            )
+            
+            for paragraph in chain(doc.paragraphs, table_paragraphs):
+                replacements_made += _replace_markers_in_paragraph(
+                    paragraph, replacement_map, marker_regex, found_markers
+                )
+                
+                # Every marker replaced: skip the rest of the document (often all of its tables)
+                if len(found_markers) == len(replacement_map):
+                    break
         
         # Save the final document
         doc.save(output_path)
@@ -3,12 +3,15 @@ File handling utilities for document processing
 Handles reference number generation, folder creation, and file operations
 """
 
+import fcntl
 import os
 
 
 def get_next_reference_number(counter_file):
     """
     Get the next reference number for uploads
+    Holds an exclusive flock on the counter file so concurrent uploads
+    (e.g. multiple gunicorn workers) never receive the same number
     
     Args:
         counter_file: Path to the counter file
@@ -16,20 +19,23 @@ def get_next_reference_number(counter_file):
     Returns:
         int: Next reference number
     """
-    if not os.path.exists(counter_file):
-        with open(counter_file, 'w') as f:
-            f.write('0')
-        return 1
-    
-    with open(counter_file, 'r') as f:
-        current = int(f.read().strip() or '0')
-    
-    next_num = current + 1
-    
-    with open(counter_file, 'w') as f:
-        f.write(str(next_num))
-    
-    return next_num
+    fd = os.open(counter_file, os.O_RDWR | os.O_CREAT, 0o644)
+    
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        
+        current = int(os.pread(fd, 32, 0).decode().strip() or '0')
+        next_num = current + 1
+        
+        # Positional write at offset 0; the number never gets shorter, but truncate anyway
+        encoded = str(next_num).encode()
+        os.pwrite(fd, encoded, 0)
+        os.ftruncate(fd, len(encoded))
+        
+        return next_num
+    finally:
+        # Closing the descriptor also releases the lock
+        os.close(fd)
 
 
 def create_reference_folder(base_folder, ref_number):
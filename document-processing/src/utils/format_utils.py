@@ -7,6 +7,19 @@ import re
 import os
 
 
+# Patterns to preserve (all caps) when title-casing
+TITLECASE_PRESERVE_RE = re.compile(r'\b(?:LLC|LLP|LP|INC|CORP|LTD|USA|US|UK)\b', re.IGNORECASE)
+
+# Unsafe filename characters mapped to '_' (str.translate, no regex engine)
+UNSAFE_FILENAME_CHARS_TABLE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+
+# Signs of an unfilled placeholder value
+OBVIOUS_PLACEHOLDER_RE = re.compile(
+    r'[\[\]{}]|___|\.\.\.|TODO|XXX|TBD|FIXME|CHANGEME|PLACEHOLDER|YOUR NAME|ENTER',
+    re.IGNORECASE
+)
+
+
 def format_facts_for_display(facts_by_name):
     """
     Format facts overlay as readable text for display
@@ -20,11 +33,7 @@ def format_facts_for_display(facts_by_name):
     if not facts_by_name:
         return "No information provided yet."
     
-    lines = []
-    for name, value in sorted(facts_by_name.items()):
-        lines.append(f"• {name}: {value}")
-    
-    return "\n".join(lines)
+    return "\n".join(f"• {name}: {value}" for name, value in sorted(facts_by_name.items()))
 
 
 def format_facts_for_prompt(facts_by_name):
@@ -40,11 +49,7 @@ def format_facts_for_prompt(facts_by_name):
     if not facts_by_name:
         return "(None)"
     
-    lines = []
-    for name, value in sorted(facts_by_name.items()):
-        lines.append(f"{name}: {value}")
-    
-    return "\n".join(lines)
+    return "\n".join(f"{name}: {value}" for name, value in sorted(facts_by_name.items()))
 
 
 def safe_titlecase(text):
@@ -58,18 +63,11 @@ def safe_titlecase(text):
     Returns:
         str: Title-cased text with exceptions
     """
-    # Patterns to preserve (all caps)
-    preserve_patterns = ['LLC', 'LLP', 'LP', 'INC', 'CORP', 'LTD', 'USA', 'US', 'UK']
-    
     # Simple titlecase
     result = text.title()
     
-    # Restore preserved patterns
-    for pattern in preserve_patterns:
-        # Case-insensitive replacement
-        result = re.sub(rf'\b{pattern}\b', pattern, result, flags=re.IGNORECASE)
-    
-    return result
+    # Restore preserved patterns in one case-insensitive pass
+    return TITLECASE_PRESERVE_RE.sub(lambda match: match.group(0).upper(), result)
 
 
 def is_obvious_placeholder(text):
@@ -82,23 +80,8 @@ def is_obvious_placeholder(text):
     Returns:
         bool: True if text looks like a placeholder
     """
-    text_upper = text.upper()
-    
-    # Check for brackets/braces
-    if '[' in text or '{' in text or ']' in text or '}' in text:
-        return True
-    
-    # Check for common placeholder strings
-    bad_strings = ['TODO', 'XXX', 'TBD', 'FIXME', 'CHANGEME', 'PLACEHOLDER', 'YOUR NAME', 'ENTER']
-    for bad in bad_strings:
-        if bad in text_upper:
-            return True
-    
-    # Check for underscore patterns (e.g., "___")
-    if '___' in text or '...' in text:
-        return True
-    
-    return False
+    # Brackets/braces, common placeholder strings, or "___" / "..." in one scan
+    return OBVIOUS_PLACEHOLDER_RE.search(text) is not None
 
 
 def truncate_text(text, max_length=100, suffix='...'):
@@ -129,7 +112,7 @@ def sanitize_filename(filename):
         str: Sanitized filename
     """
     # Remove or replace unsafe characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = filename.translate(UNSAFE_FILENAME_CHARS_TABLE)
     
     # Remove leading/trailing spaces and dots
     filename = filename.strip('. ')
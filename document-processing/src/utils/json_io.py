@@ -1,12 +1,142 @@
 """
 JSON I/O utilities
 Handles atomic loading and saving of per-reference JSON files
+
+Single-placeholder updates are appended to a journal file next to the JSON
+(<name>.journal) and replayed on load; a full save folds them back in
 """
 
-import json
+import logging
 import os
+import re
 import tempfile
-import shutil
+from functools import lru_cache
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from utils.format_utils import is_obvious_placeholder
+
+logger = logging.getLogger(__name__)
+
+
+JOURNAL_COMPACT_BYTES = 256 * 1024  # Fold the journal into the JSON past this size
+
+# Values that look like placeholders are never stored in the facts overlay
+FACTS_PLACEHOLDER_RE = re.compile(
+    r'^\[.*\]$'             # [Something]
+    r'|^\{\{.*\}\}$'        # {{Something}}
+    r'|^\{.*\}$'            # {Something}
+    r'|^\[?[A-Z_\s]+\]?$'   # [ALL CAPS] or ALL_CAPS
+    r'|^placeholder_\d+$'   # placeholder_001
+)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson (used by jsonify and request.get_json)
+    Falls back to the default provider for types orjson cannot serialize
+    """
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        
+        try:
+            return orjson.dumps(obj, option=option).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _journal_path(json_path):
+    """Path of the update journal belonging to a reference JSON file"""
+    return os.path.splitext(json_path)[0] + '.journal'
+
+
+def _replay_journal(data, journal_path):
+    """Apply journaled placeholder updates to freshly loaded data (in place)"""
+    try:
+        with open(journal_path, 'rb') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return data
+    
+    for line in lines:
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # Torn final write - everything before it is intact
+            break
+        
+        placeholder = get_placeholder_by_id(data, entry['placeholder']['placeholder_id'])
+        if placeholder is not None:
+            placeholder.clear()
+            placeholder.update(entry['placeholder'])
+        data['facts_overlay'] = entry['facts_overlay']
+        data['facts_overlay_by_name'] = entry['facts_overlay_by_name']
+    
+    return data
+
+
+def _read_json_file(json_path):
+    """Read and parse a reference JSON file, including journaled updates"""
+    with open(json_path, 'rb') as f:
+        data = orjson.loads(f.read())
+    return _replay_journal(data, _journal_path(json_path))
+
+
+def load_reference_file(json_path):
+    """
+    Load a reference JSON file by path, including journaled updates
+    
+    Args:
+        json_path: Path to the *_placeholders.json file
+    
+    Returns:
+        dict: Loaded JSON data
+    """
+    return _read_json_file(json_path)
+
+
+@lru_cache(maxsize=1024)
+def _cached_reference_json_path(ref_folder):
+    """Scan a reference folder for its *_placeholders.json (raises if missing, so misses aren't cached)"""
+    for name in os.listdir(ref_folder):
+        if name.endswith('_placeholders.json'):
+            return os.path.join(ref_folder, name)
+    raise FileNotFoundError(f"No JSON file found in {ref_folder}")
+
+
+def find_reference_json_path(ref_folder):
+    """
+    Resolve the placeholders JSON path of a reference
+    The name is fixed once upload writes it, so the directory scan is cached per folder
+    
+    Args:
+        ref_folder: Path to the reference folder
+    
+    Returns:
+        str: Path to the *_placeholders.json file, or None if not found
+    """
+    try:
+        json_path = _cached_reference_json_path(ref_folder)
+    except FileNotFoundError:
+        return None
+    
+    # Folder removed or replaced since it was cached: rescan once
+    if not os.path.exists(json_path):
+        _cached_reference_json_path.cache_clear()
+        try:
+            json_path = _cached_reference_json_path(ref_folder)
+        except FileNotFoundError:
+            return None
+    
+    return json_path
 
 
 def load_reference_json(ref_folder):
@@ -20,18 +150,52 @@ def load_reference_json(ref_folder):
         dict: Loaded JSON data, or None if not found
     """
     # Find the JSON file (should be only one *_placeholders.json)
-    json_files = [f for f in os.listdir(ref_folder) if f.endswith('_placeholders.json')]
+    json_path = find_reference_json_path(ref_folder)
     
-    if not json_files:
+    if json_path is None:
         return None
     
-    json_path = os.path.join(ref_folder, json_files[0])
+    try:
+        return _read_json_file(json_path)
+    except Exception as e:
+        logger.error(f"Error loading JSON from {json_path}: {str(e)}")
+        return None
+
+
+@lru_cache(maxsize=256)
+def _load_reference_json_version(json_path, mtime_ns, size, journal_size):
+    """Parse one on-disk version of a reference JSON (cached per mtime/size)"""
+    return _read_json_file(json_path)
+
+
+def load_reference_json_cached(ref_folder):
+    """
+    Load the placeholders JSON for a reference through an in-process cache
+    The cache is keyed by file mtime/size and journal size, so every save invalidates it
+    
+    The returned dict is shared between callers and must be treated as
+    read-only; use load_reference_json when the data will be modified
+    
+    Args:
+        ref_folder: Path to the reference folder
+    
+    Returns:
+        dict: Loaded JSON data, or None if not found
+    """
+    json_path = find_reference_json_path(ref_folder)
+    
+    if json_path is None:
+        return None
     
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        stat = os.stat(json_path)
+        try:
+            journal_size = os.stat(_journal_path(json_path)).st_size
+        except FileNotFoundError:
+            journal_size = 0
+        return _load_reference_json_version(json_path, stat.st_mtime_ns, stat.st_size, journal_size)
     except Exception as e:
-        print(f"Error loading JSON from {json_path}: {str(e)}")
+        logger.error(f"Error loading JSON from {json_path}: {str(e)}")
         return None
 
 
@@ -48,35 +212,169 @@ def save_reference_json(ref_folder, data):
         bool: True if successful
     """
     # Find the JSON file name
-    json_files = [f for f in os.listdir(ref_folder) if f.endswith('_placeholders.json')]
+    json_path = find_reference_json_path(ref_folder)
     
-    if not json_files:
-        print(f"No JSON file found in {ref_folder}")
+    if json_path is None:
+        logger.error(f"No JSON file found in {ref_folder}")
         return False
-    
-    json_path = os.path.join(ref_folder, json_files[0])
+    temp_path = None
     
     try:
         # Write to temp file first
         temp_fd, temp_path = tempfile.mkstemp(dir=ref_folder, suffix='.json')
         
-        with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with os.fdopen(temp_fd, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         
-        # Atomic rename
-        shutil.move(temp_path, json_path)
+        # Atomic rename (temp file is in the same folder, so always the same filesystem)
+        os.replace(temp_path, json_path)
+        
+        # The snapshot now contains every journaled update
+        if os.path.exists(_journal_path(json_path)):
+            os.unlink(_journal_path(json_path))
         
         return True
     except Exception as e:
-        print(f"Error saving JSON to {json_path}: {str(e)}")
-        if os.path.exists(temp_path):
+        logger.error(f"Error saving JSON to {json_path}: {str(e)}")
+        if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
         return False
 
 
+def save_placeholder_update(ref_folder, data, placeholder_id):
+    """
+    Persist a change to one placeholder (plus the facts overlays) by appending
+    it to the reference journal instead of rewriting the whole JSON
+    Falls back to a full save once the journal grows past JOURNAL_COMPACT_BYTES
+    
+    Args:
+        ref_folder: Path to the reference folder
+        data: JSON data dictionary (already updated in memory)
+        placeholder_id: ID of the placeholder that changed
+    
+    Returns:
+        bool: True if successful
+    """
+    json_path = find_reference_json_path(ref_folder)
+    
+    if json_path is None:
+        logger.error(f"No JSON file found in {ref_folder}")
+        return False
+    
+    journal_path = _journal_path(json_path)
+    
+    entry = {
+        'placeholder': get_placeholder_by_id(data, placeholder_id),
+        'facts_overlay': data.get('facts_overlay', {}),
+        'facts_overlay_by_name': data.get('facts_overlay_by_name', {})
+    }
+    
+    try:
+        with open(journal_path, 'ab') as f:
+            f.write(orjson.dumps(entry) + b'\n')
+            journal_size = f.tell()
+    except Exception as e:
+        logger.error(f"Error appending to journal {journal_path}: {str(e)}")
+        return save_reference_json(ref_folder, data)
+    
+    if journal_size > JOURNAL_COMPACT_BYTES:
+        return save_reference_json(ref_folder, data)
+    
+    return True
+
+
+DOCUMENT_TEXT_FILENAME = 'document_text.txt'
+
+
+def save_document_text(ref_folder, document_text):
+    """
+    Store the extracted document text in a sidecar file next to the JSON
+    Keeps the bulk text out of the reference JSON that every request rewrites
+    
+    Args:
+        ref_folder: Path to the reference folder
+        document_text: Extracted document text
+    
+    Returns:
+        str: Sidecar filename (relative to ref_folder) to store as document_text_path
+    """
+    with open(os.path.join(ref_folder, DOCUMENT_TEXT_FILENAME), 'w', encoding='utf-8') as f:
+        f.write(document_text)
+    
+    return DOCUMENT_TEXT_FILENAME
+
+
+def load_document_text(ref_folder, data):
+    """
+    Load the document text for a reference on demand
+    Falls back to the inline document_text of references created before the sidecar file
+    
+    Args:
+        ref_folder: Path to the reference folder
+        data: JSON data dictionary
+    
+    Returns:
+        str: Document text, or empty string if not available
+    """
+    if 'document_text' in data:
+        return data['document_text']
+    
+    text_path = data.get('document_text_path')
+    if not text_path:
+        return ""
+    
+    try:
+        with open(os.path.join(ref_folder, text_path), 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        logger.error(f"Error loading document text from {ref_folder}: {str(e)}")
+        return ""
+
+
+def build_progress(status_counts, total):
+    """
+    Build the progress dict returned by the API
+    
+    Args:
+        status_counts: collections.Counter of placeholder statuses
+        total: Total number of placeholders
+    
+    Returns:
+        dict: Progress counts by status plus total
+    """
+    return {
+        'filled': status_counts['filled'],
+        'auto_filled': status_counts['auto_filled'],
+        'pending': status_counts['pending'],
+        'skipped': status_counts['skipped'],
+        'total': total
+    }
+
+
+def build_placeholder_indexes(placeholders):
+    """
+    Build lookup indexes stored alongside the placeholders list
+    
+    Args:
+        placeholders: List of placeholder dictionaries (final order)
+    
+    Returns:
+        tuple: (placeholder_index {id: list position}, name_to_ids {name: [ids]})
+    """
+    placeholder_index = {}
+    name_to_ids = {}
+    
+    for i, placeholder in enumerate(placeholders):
+        placeholder_index[placeholder['placeholder_id']] = i
+        name_to_ids.setdefault(placeholder['placeholder_name'], []).append(placeholder['placeholder_id'])
+    
+    return placeholder_index, name_to_ids
+
+
 def get_placeholder_by_id(data, placeholder_id):
     """
     Get a specific placeholder from JSON data
+    Uses the stored placeholder_index when present, otherwise scans the list
     
     Args:
         data: JSON data dictionary
@@ -87,6 +385,12 @@ def get_placeholder_by_id(data, placeholder_id):
     """
     placeholders = data.get('placeholders', [])
     
+    index = data.get('placeholder_index', {}).get(placeholder_id)
+    if index is not None and index < len(placeholders):
+        placeholder = placeholders[index]
+        if placeholder.get('placeholder_id') == placeholder_id:
+            return placeholder
+    
     for placeholder in placeholders:
         if placeholder.get('placeholder_id') == placeholder_id:
             return placeholder
@@ -105,27 +409,15 @@ def update_facts_overlay(data, placeholder_id, placeholder_name, value):
         placeholder_name: Placeholder name
         value: Normalized value to store
     """
-    from utils.format_utils import is_obvious_placeholder
-    import re
-    
     # Don't store if the value looks like a placeholder
     if is_obvious_placeholder(value):
-        print(f"Warning: Not storing placeholder pattern '{value}' in facts overlay")
+        logger.warning(f"Not storing placeholder pattern '{value}' in facts overlay")
         return
     
     # Check additional placeholder patterns
-    placeholder_patterns = [
-        r'^\[.*\]$',           # [Something]
-        r'^\{\{.*\}\}$',       # {{Something}}
-        r'^\{.*\}$',           # {Something}
-        r'^\[?[A-Z_\s]+\]?$',  # [ALL CAPS] or ALL_CAPS
-        r'^placeholder_\d+$',  # placeholder_001
-    ]
-    
-    for pattern in placeholder_patterns:
-        if re.match(pattern, value.strip()):
-            print(f"Warning: Value '{value}' looks like a placeholder, not storing in facts overlay")
-            return
+    if FACTS_PLACEHOLDER_RE.match(value.strip()):
+        logger.warning(f"Value '{value}' looks like a placeholder, not storing in facts overlay")
+        return
     
     # Update by ID (authoritative)
     if 'facts_overlay' not in data:
@@ -0,0 +1,113 @@
+"""
+LLM response cache utilities
+Persists completion text keyed by model + prompt so repeated prompts skip the API
+"""
+
+import logging
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+LLM_MEMORY_CACHE_SIZE = 512  # Recent responses kept in process (least recently used are dropped)
+
+# (cache_path, key) -> response; hits skip opening the SQLite file
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def _remember_response(cache_path, key, response):
+    """Put a response in the in-process cache, evicting the least recently used"""
+    with _memory_cache_lock:
+        _memory_cache[(cache_path, key)] = response
+        _memory_cache.move_to_end((cache_path, key))
+        if len(_memory_cache) > LLM_MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def compute_llm_cache_key(prompt, model):
+    """
+    Compute the cache key for an LLM completion
+    
+    Args:
+        prompt: Fully rendered prompt
+        model: Model the prompt is sent to
+    
+    Returns:
+        str: BLAKE2b hex digest of model + prompt
+    """
+    return hashlib.blake2b(f"{model}\x00{prompt}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _open_llm_cache(cache_path):
+    """Open the LLM response cache database, creating the table if needed"""
+    conn = sqlite3.connect(cache_path, timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses ("
+        "key TEXT PRIMARY KEY, response TEXT NOT NULL, model TEXT, created_at TEXT)"
+    )
+    return conn
+
+
+def get_cached_response(cache_path, key):
+    """
+    Look up a cached LLM response
+    Recent responses are served from memory, older ones from SQLite
+    
+    Args:
+        cache_path: Path to the SQLite cache file
+        key: Cache key from compute_llm_cache_key
+    
+    Returns:
+        str: Cached response text, or None on miss
+    """
+    with _memory_cache_lock:
+        response = _memory_cache.get((cache_path, key))
+        if response is not None:
+            _memory_cache.move_to_end((cache_path, key))
+            return response
+    
+    try:
+        conn = _open_llm_cache(cache_path)
+        try:
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading LLM cache: {str(e)}")
+        return None
+    
+    if row is None:
+        return None
+    
+    _remember_response(cache_path, key, row[0])
+    return row[0]
+
+
+def store_cached_response(cache_path, key, response, model):
+    """
+    Store an LLM response in the cache
+    
+    Args:
+        cache_path: Path to the SQLite cache file
+        key: Cache key from compute_llm_cache_key
+        response: Response text
+        model: Model that produced the response
+    """
+    _remember_response(cache_path, key, response)
+    
+    try:
+        conn = _open_llm_cache(cache_path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, model, created_at) VALUES (?, ?, ?, ?)",
+                    (key, response, model, datetime.now().isoformat())
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error writing LLM cache: {str(e)}")
@@ -3,26 +3,32 @@ LLM-based type inference using GPT-5-nano
 Much smarter than regex - understands context
 """
 
+import logging
 import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
+logger = logging.getLogger(__name__)
 
-def infer_type_with_llm(placeholder_name, context_before, context_after, document_summary, openai_client, model):
+
+FALLBACK_INFERENCE_WORKERS = 8  # Concurrent single-placeholder calls when the batched call misses some
+
+VALID_TYPES = ['legal_name', 'date', 'monetary_value', 'email', 'address', 'jurisdiction', 'numeric', 'text']
+
+
+def build_type_inference_prompt(placeholder_name, context_before, context_after):
     """
-    Use LLM to infer the expected type for a placeholder
+    Build the single-placeholder type inference prompt
     
     Args:
         placeholder_name: Name of the placeholder
         context_before: Text before placeholder
-        context_after: Text after placeholder  
-        document_summary: Document summary for additional context
-        openai_client: OpenAI client
-        model: Model to use (GPT-5-nano)
+        context_after: Text after placeholder
     
     Returns:
-        str: Expected type (legal_name, date, monetary_value, email, address, jurisdiction, numeric, text)
+        str: Prompt text
     """
-    
-    prompt = f"""You are analyzing a legal document placeholder to determine what type of value it expects.
+    return f"""You are analyzing a legal document placeholder to determine what type of value it expects.
 
 Document type: SAFE Agreement
 
@@ -50,6 +56,38 @@ Respond with ONLY the type name, nothing else. Be smart - if context shows "$" b
 
 Type:"""
 
+
+def parse_inferred_type(response_text):
+    """
+    Map a raw model reply to a known type
+    
+    Args:
+        response_text: Model output
+    
+    Returns:
+        str: Known type name, or 'text' if unrecognized
+    """
+    inferred_type = (response_text or '').strip().lower()
+    return inferred_type if inferred_type in VALID_TYPES else 'text'
+
+
+def infer_type_with_llm(placeholder_name, context_before, context_after, document_summary, openai_client, model):
+    """
+    Use LLM to infer the expected type for a placeholder
+    
+    Args:
+        placeholder_name: Name of the placeholder
+        context_before: Text before placeholder
+        context_after: Text after placeholder  
+        document_summary: Document summary for additional context
+        openai_client: OpenAI client
+        model: Model to use (GPT-5-nano)
+    
+    Returns:
+        str: Expected type (legal_name, date, monetary_value, email, address, jurisdiction, numeric, text)
+    """
+    prompt = build_type_inference_prompt(placeholder_name, context_before, context_after)
+
     try:
         response = openai_client.chat.completions.create(
             model=model,
@@ -58,24 +96,89 @@ Type:"""
             max_tokens=20
         )
         
-        inferred_type = response.choices[0].message.content.strip().lower()
+        # Validate it's a known type (fallback to text)
+        return parse_inferred_type(response.choices[0].message.content)
         
-        # Validate it's a known type
-        valid_types = ['legal_name', 'date', 'monetary_value', 'email', 'address', 'jurisdiction', 'numeric', 'text']
-        if inferred_type in valid_types:
-            return inferred_type
-        
-        # Fallback
+    except Exception as e:
+        logger.error(f"Error in LLM type inference: {str(e)}")
         return 'text'
+
+
+def infer_types_batch_with_llm(placeholders, openai_client, model):
+    """
+    Use a single LLM call to infer the expected type for every placeholder
+    
+    Args:
+        placeholders: List of placeholder dictionaries
+        openai_client: OpenAI client
+        model: Model to use (GPT-5-nano)
+    
+    Returns:
+        dict: {index: expected_type} for every placeholder the model answered
+    """
+    items = []
+    for i, placeholder in enumerate(placeholders):
+        context_before = placeholder['context_before']
+        context_after = placeholder['context_after']
+        items.append({
+            "id": i,
+            "name": placeholder['placeholder_name'],
+            "context": f"{context_before[-200:]} <<PLACEHOLDER>> {context_after[:200]}"
+        })
+    
+    prompt = f"""You are analyzing legal document placeholders to determine what type of value each one expects.
+
+Document type: SAFE Agreement
+
+Placeholders (JSON list, <<PLACEHOLDER>> marks where the value goes in the context):
+{json.dumps(items, ensure_ascii=False, indent=2)}
+
+Available types:
+- legal_name: Company or person name (e.g., "Acme Inc.", "John Smith")
+- date: Calendar date (e.g., "2025-05-15", "May 5, 2025")
+- monetary_value: Dollar amount (e.g., "1000000", "$1,000,000")
+- email: Email address
+- address: Physical/mailing address
+- jurisdiction: US state or legal jurisdiction (e.g., "Delaware", "California")
+- numeric: Plain number (shares, quantity, etc.)
+- text: Free text or anything else
+
+Be smart - if context shows "$" before the placeholder, it's monetary_value even if the placeholder name is unclear.
+
+Respond strictly in JSON with one entry per placeholder id:
+{{"types": [{{"id": 0, "expected_type": "legal_name"}}, ...]}}"""
+
+    try:
+        response = openai_client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=50 + 20 * len(placeholders)
+        )
+        
+        result = orjson.loads(response.choices[0].message.content)
+        
+        inferred = {}
+        for entry in result.get('types', []):
+            index = entry.get('id')
+            expected_type = str(entry.get('expected_type', '')).strip().lower()
+            if isinstance(index, int) and 0 <= index < len(placeholders):
+                # Unknown types fall back to text, same as the single-call path
+                inferred[index] = expected_type if expected_type in VALID_TYPES else 'text'
+        
+        return inferred
         
     except Exception as e:
-        print(f"Error in LLM type inference: {str(e)}")
-        return 'text'
+        logger.error(f"Error in batched LLM type inference: {str(e)}")
+        return {}
 
 
 def enrich_placeholders_with_llm_types(placeholders, document_summary, openai_client, model):
     """
     Enrich all placeholders with LLM-inferred types
+    All placeholders are sent in one request; any the model skips are
+    inferred individually (concurrently, one call per distinct prompt)
     
     Args:
         placeholders: List of placeholder dictionaries
@@ -86,15 +189,38 @@ def enrich_placeholders_with_llm_types(placeholders, document_summary, openai_cl
     Returns:
         list: Placeholders with expected_type and priority
     """
-    for placeholder in placeholders:
-        expected_type = infer_type_with_llm(
-            placeholder['placeholder_name'],
-            placeholder['context_before'],
-            placeholder['context_after'],
-            document_summary,
-            openai_client,
-            model
-        )
+    if not placeholders:
+        return placeholders
+    
+    inferred = infer_types_batch_with_llm(placeholders, openai_client, model)
+    
+    # Placeholders the batch call missed; identical prompts are only sent once
+    fallback_keys = {}
+    for i, placeholder in enumerate(placeholders):
+        if inferred.get(i) is None:
+            fallback_keys[i] = (
+                placeholder['placeholder_name'],
+                placeholder['context_before'][-200:],
+                placeholder['context_after'][:200]
+            )
+    
+    fallback_types = {}
+    if fallback_keys:
+        distinct_keys = list(dict.fromkeys(fallback_keys.values()))
+        
+        # Independent network-bound calls, so run them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(distinct_keys), FALLBACK_INFERENCE_WORKERS)) as executor:
+            results = executor.map(
+                lambda key: infer_type_with_llm(key[0], key[1], key[2], document_summary, openai_client, model),
+                distinct_keys
+            )
+            fallback_types = dict(zip(distinct_keys, results))
+    
+    for i, placeholder in enumerate(placeholders):
+        expected_type = inferred.get(i)
+        
+        if expected_type is None:
+            expected_type = fallback_types[fallback_keys[i]]
         
         placeholder['expected_type'] = expected_type
         placeholder['priority'] = assign_priority(expected_type)
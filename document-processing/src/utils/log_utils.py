@@ -1,11 +1,94 @@
 """
 Logging utilities
-Handles JSONL logging to actions.log per reference
+Handles JSONL logging to actions.log per reference and application log setup
 """
 
-import json
+import atexit
+import logging
 import os
+import queue
+import sys
+import threading
+import orjson
+from collections import OrderedDict
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+
+logger = logging.getLogger(__name__)
+
+_log_listener = None
+
+APP_LOGGER_NAMES = ('app', '__main__', 'utils')  # app.py (imported or run directly) and utils.* modules
+APP_LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+ACTION_LOG_MAX_OPEN_FILES = 64  # actions.log descriptors kept open (least recently used are closed)
+
+# Open actions.log files keyed by path; unbuffered so every entry is a single O_APPEND write
+_action_log_files = OrderedDict()
+_action_log_lock = threading.Lock()
+
+
+def setup_logging(level=logging.INFO):
+    """
+    Route application logging through an in-process queue
+    Request threads only enqueue records; a background QueueListener thread
+    writes them to stdout, so logging never blocks on a stdout write
+    Only the app's own loggers are attached (propagate=False); third-party
+    loggers (werkzeug, httpx, openai) keep whatever the server configures
+    
+    Args:
+        level: Log level for the app loggers
+    """
+    global _log_listener
+    
+    if _log_listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(APP_LOG_FORMAT))
+    
+    _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    queue_handler = QueueHandler(log_queue)
+    for logger_name in APP_LOGGER_NAMES:
+        app_logger = logging.getLogger(logger_name)
+        app_logger.addHandler(queue_handler)
+        app_logger.setLevel(level)
+        app_logger.propagate = False
+
+
+def _get_action_log_file(log_path):
+    """Get the open actions.log file for a path (caller holds _action_log_lock)"""
+    log_file = _action_log_files.get(log_path)
+    
+    if log_file is not None:
+        _action_log_files.move_to_end(log_path)
+        return log_file
+    
+    log_file = open(log_path, 'ab', buffering=0)
+    _action_log_files[log_path] = log_file
+    
+    if len(_action_log_files) > ACTION_LOG_MAX_OPEN_FILES:
+        _, oldest = _action_log_files.popitem(last=False)
+        oldest.close()
+    
+    return log_file
+
+
+def close_action_logs():
+    """Close all cached actions.log files"""
+    with _action_log_lock:
+        for log_file in _action_log_files.values():
+            log_file.close()
+        _action_log_files.clear()
+
+
+atexit.register(close_action_logs)
 
 
 def log_action(ref_folder, action_type, placeholder_id=None, status=None, model=None, latency_ms=None, **extra):
@@ -44,14 +127,43 @@ def log_action(ref_folder, action_type, placeholder_id=None, status=None, model=
     log_entry.update(extra)
     
     try:
-        with open(log_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        line = orjson.dumps(log_entry) + b'\n'
+        with _action_log_lock:
+            _get_action_log_file(log_path).write(line)
         return True
     except Exception as e:
-        print(f"Error writing to actions.log: {str(e)}")
+        logger.error(f"Error writing to actions.log: {str(e)}")
         return False
 
 
+def _parse_action_line(line):
+    """Parse one actions.log line; None for blank or torn lines"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _iter_lines_reversed(f, block_size=64 * 1024):
+    """Yield the lines of a binary file from last to first, reading block by block"""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    remainder = b''
+    
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        lines = (f.read(read_size) + remainder).split(b'\n')
+        remainder = lines[0]
+        yield from reversed(lines[1:])
+    
+    yield remainder
+
+
 def read_actions_log(ref_folder, limit=None):
     """
     Read actions from log (for debugging/admin)
@@ -69,22 +181,22 @@ def read_actions_log(ref_folder, limit=None):
         return []
     
     try:
-        with open(log_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        entries = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-        
-        if limit:
-            return entries[-limit:]
-        return entries
+        with open(log_path, 'rb') as f:
+            if not limit:
+                return [entry for entry in map(_parse_action_line, f) if entry is not None]
+            
+            # Only the most recent entries are wanted: read backwards from the end
+            entries = []
+            for line in _iter_lines_reversed(f):
+                entry = _parse_action_line(line)
+                if entry is not None:
+                    entries.append(entry)
+                    if len(entries) == limit:
+                        break
+            
+            entries.reverse()
+            return entries
     except Exception as e:
-        print(f"Error reading actions.log: {str(e)}")
+        logger.error(f"Error reading actions.log: {str(e)}")
         return []
 
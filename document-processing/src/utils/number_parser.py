@@ -7,6 +7,18 @@ import re
 from decimal import Decimal
 
 
+MULTIPLIERS = {
+    'k': 1_000,
+    'thousand': 1_000,
+    'm': 1_000_000,
+    'million': 1_000_000,
+    'b': 1_000_000_000,
+    'billion': 1_000_000_000
+}
+
+NUMBER_WITH_MULTIPLIER_RE = re.compile(r'([\d.]+)\s*(k|thousand|m|million|b|billion)?')
+
+
 def parse_number_input(user_input):
     """
     Parse user input into a numerical value
@@ -23,20 +35,9 @@ def parse_number_input(user_input):
     # Remove dollar signs and commas
     user_input = user_input.replace('$', '').replace(',', '').strip()
     
-    # Check for multipliers
-    multipliers = {
-        'k': 1_000,
-        'thousand': 1_000,
-        'm': 1_000_000,
-        'million': 1_000_000,
-        'b': 1_000_000_000,
-        'billion': 1_000_000_000
-    }
-    
     # Try to extract number with multiplier
     # Patterns: "1.5m", "1 million", "50k", "1.5 million"
-    pattern = r'([\d.]+)\s*(k|thousand|m|million|b|billion)?'
-    match = re.match(pattern, user_input)
+    match = NUMBER_WITH_MULTIPLIER_RE.match(user_input)
     
     if match:
         try:
@@ -45,8 +46,8 @@ def parse_number_input(user_input):
             
             base_value = Decimal(number_part)
             
-            if multiplier_part and multiplier_part in multipliers:
-                final_value = base_value * multipliers[multiplier_part]
+            if multiplier_part and multiplier_part in MULTIPLIERS:
+                final_value = base_value * MULTIPLIERS[multiplier_part]
             else:
                 final_value = base_value
             
@@ -3,9 +3,22 @@ Placeholder detection and processing utilities
 Handles placeholder detection, context extraction, and document marking
 """
 
+import logging
+import os
 import re
 import json
-from docx import Document
+from bisect import bisect_left
+from collections import deque
+from itertools import chain
+
+logger = logging.getLogger(__name__)
+
+
+# Leading global inline flags, e.g. (?i); only legal at the very start of a pattern
+GLOBAL_FLAGS_RE = re.compile(r'^\(\?([aiLmsux]+)\)')
+# Numeric backreferences (\1) and conditionals ((?(1)...)) that would point at the
+# wrong group once the pattern is nested inside the combined alternation
+NUMBERED_GROUP_REF_RE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d+\)')
 
 
 def extract_document_text(doc):
@@ -18,22 +31,76 @@ def extract_document_text(doc):
     Returns:
         str: Extracted text
     """
-    full_text = []
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            full_text.append(paragraph.text)
+    # paragraph.text / cell.text walk the XML on every access, so read each once
+    paragraph_texts = (paragraph.text for paragraph in doc.paragraphs)
     
     # Also extract text from tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                if cell.text.strip():
-                    full_text.append(cell.text)
+    cell_texts = (cell.text for table in doc.tables for row in table.rows for cell in row.cells)
     
-    return '\n'.join(full_text)
+    # Skip empty/whitespace-only nodes without allocating a stripped copy
+    return '\n'.join(text for text in chain(paragraph_texts, cell_texts) if text and not text.isspace())
 
 
-def extract_context(text, start_pos, end_pos, words_count):
+def build_word_spans(text):
+    """
+    Compute (start, end) offsets of every whitespace-separated word, in order
+    Built once per document so extract_context can bisect instead of re-splitting
+    
+    Args:
+        text: The full document text
+    
+    Returns:
+        list: (start, end) tuples
+    """
+    return [match.span() for match in re.finditer(r'\S+', text)]
+
+
+CONTEXT_SCAN_CHARS_PER_WORD = 16  # Initial scan window per context word; doubled until enough words
+
+
+def _context_before_scan(text, start_pos, words_count):
+    """Context words before start_pos, reading only a window that grows from start_pos backwards"""
+    # words_count <= 0 keeps the historical "whole text" result, so scan everything
+    window_size = words_count * CONTEXT_SCAN_CHARS_PER_WORD if words_count > 0 else len(text)
+    
+    while True:
+        window_start = max(0, start_pos - window_size)
+        text_before = text[window_start:start_pos].strip()
+        words_before = text_before.split()
+        
+        # Reached the start of the text: same result as scanning all of it
+        if window_start == 0:
+            context_before = ' '.join(words_before[-words_count:]) if len(words_before) > words_count else text_before
+            return context_before, min(len(words_before), words_count)
+        
+        # More words than needed, so the last words_count are complete even if the first was cut
+        if len(words_before) > words_count:
+            return ' '.join(words_before[-words_count:]), words_count
+        
+        window_size *= 2
+
+
+def _context_after_scan(text, end_pos, words_count):
+    """Context words after end_pos, reading only a window that grows from end_pos forwards"""
+    # words_count <= 0 keeps the historical "whole text" result, so scan everything
+    window_size = words_count * CONTEXT_SCAN_CHARS_PER_WORD if words_count > 0 else len(text)
+    
+    while True:
+        window_end = end_pos + window_size
+        text_after = text[end_pos:window_end].strip()
+        words_after = text_after.split()
+        
+        if window_end >= len(text):
+            context_after = ' '.join(words_after[:words_count]) if len(words_after) > words_count else text_after
+            return context_after, min(len(words_after), words_count)
+        
+        if len(words_after) > words_count:
+            return ' '.join(words_after[:words_count]), words_count
+        
+        window_size *= 2
+
+
+def extract_context(text, start_pos, end_pos, words_count, word_spans=None):
     """
     Extract context before and after a placeholder position
     
@@ -42,171 +109,286 @@ def extract_context(text, start_pos, end_pos, words_count):
         start_pos: Start position of the placeholder
         end_pos: End position of the placeholder
         words_count: Number of words to extract before and after
+        word_spans: Optional precomputed build_word_spans(text)
     
     Returns:
         tuple: (context_before, context_after, before_words_actual, after_words_actual)
     """
-    # Extract text before the placeholder
-    text_before = text[:start_pos].strip()
-    words_before = text_before.split()
-    context_before = ' '.join(words_before[-words_count:]) if len(words_before) > words_count else text_before
-    before_words_actual = min(len(words_before), words_count)
-    
-    # Extract text after the placeholder
-    text_after = text[end_pos:].strip()
-    words_after = text_after.split()
-    context_after = ' '.join(words_after[:words_count]) if len(words_after) > words_count else text_after
-    after_words_actual = min(len(words_after), words_count)
+    if word_spans is None:
+        context_before, before_words_actual = _context_before_scan(text, start_pos, words_count)
+        context_after, after_words_actual = _context_after_scan(text, end_pos, words_count)
+        return context_before, context_after, before_words_actual, after_words_actual
+    
+    # Words before: every span starting before start_pos (the last one is clipped at start_pos)
+    before_end = bisect_left(word_spans, (start_pos,))
+    if before_end > words_count:
+        context_before = ' '.join(
+            text[word_spans[i][0]:min(word_spans[i][1], start_pos)]
+            for i in range(before_end)[-words_count:]
+        )
+    elif before_end:
+        context_before = text[word_spans[0][0]:min(word_spans[before_end - 1][1], start_pos)]
+    else:
+        context_before = ''
+    before_words_actual = min(before_end, words_count)
+    
+    # Words after: every span ending after end_pos (the first one is clipped at end_pos)
+    after_start = bisect_left(word_spans, (end_pos,))
+    if after_start and word_spans[after_start - 1][1] > end_pos:
+        after_start -= 1
+    after_total = len(word_spans) - after_start
+    if after_total > words_count:
+        context_after = ' '.join(
+            text[max(word_spans[i][0], end_pos):word_spans[i][1]]
+            for i in range(after_start, len(word_spans))[:words_count]
+        )
+    elif after_total:
+        context_after = text[max(word_spans[after_start][0], end_pos):word_spans[-1][1]]
+    else:
+        context_after = ''
+    after_words_actual = min(after_total, words_count)
     
     return context_before, context_after, before_words_actual, after_words_actual
 
 
-def detect_placeholders(text, patterns_config):
+def compile_placeholder_patterns(patterns_config):
     """
-    Detect placeholders in the document text using regex patterns from config
+    Compile the enabled regex patterns from config into a single alternation
+    Each pattern is wrapped in a named group (p0, p1, ...) so one scan finds
+    every placeholder in document order; earlier patterns win at the same position
+    
+    Leading global flags such as (?i) are rewritten as scoped flags (?i:...).
+    Patterns that refer to groups by number, and every pattern if the combined
+    regex fails to compile, are scanned separately instead
     
     Args:
-        text: The document text
         patterns_config: Configuration dict with patterns
     
     Returns:
-        list: List of dictionaries containing placeholder information
+        tuple: (combined compiled regex or None,
+                {group name: (pattern_name, name group index)},
+                [(pattern_name, compiled regex)] scanned separately)
     """
-    patterns = patterns_config.get('patterns', [])
-    context_words_count = patterns_config.get('context_words_count', 20)
+    alternatives = []
+    separate = []
     
-    # Filter enabled patterns only
-    enabled_patterns = [p for p in patterns if p.get('enabled', True)]
-    
-    placeholders = []
-    placeholder_counter = 1
-    
-    for pattern_config in enabled_patterns:
+    for pattern_config in patterns_config.get('patterns', []):
+        # Filter enabled patterns only
+        if not pattern_config.get('enabled', True):
+            continue
+        
         pattern = pattern_config.get('regex')
         pattern_name = pattern_config.get('name', 'unknown')
         
         if not pattern:
             continue
         
+        # Validate each pattern on its own so one bad entry doesn't disable the rest
         try:
-            for match in re.finditer(pattern, text):
-                placeholder_text = match.group(0)
-                placeholder_name = match.group(1).strip()
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Extract context using configured word count
-                context_before, context_after, before_words_actual, after_words_actual = extract_context(
-                    text, start_pos, end_pos, context_words_count
-                )
-                
-                placeholder_info = {
-                    "placeholder_id": f"placeholder_{str(placeholder_counter).zfill(3)}",
-                    "placeholder": placeholder_text,
-                    "placeholder_name": placeholder_name,
-                    "description": f"the '{placeholder_name}'",
-                    "pattern_type": pattern_name,
-                    "position": {
-                        "start": start_pos,
-                        "end": end_pos
-                    },
-                    "context_before": context_before,
-                    "context_after": context_after,
-                    "context_window": {
-                        "before_words": before_words_actual,
-                        "after_words": after_words_actual
-                    },
-                    "user_input": None,
-                    "status": "pending"
-                }
-                
-                placeholders.append(placeholder_info)
-                placeholder_counter += 1
+            compiled = re.compile(pattern)
         except re.error as e:
-            print(f"Error in regex pattern '{pattern_name}': {str(e)}")
+            logger.error(f"Error in regex pattern '{pattern_name}': {str(e)}")
             continue
+        
+        if compiled.groups < 1:
+            logger.error(f"Error in regex pattern '{pattern_name}': missing capture group for the placeholder name")
+            continue
+        
+        if NUMBERED_GROUP_REF_RE.search(pattern):
+            separate.append((pattern_name, compiled))
+            continue
+        
+        flags_match = GLOBAL_FLAGS_RE.match(pattern)
+        if flags_match:
+            pattern = f"(?{flags_match.group(1)}:{pattern[flags_match.end():]})"
+        
+        alternatives.append((pattern_name, pattern, compiled))
+    
+    if not alternatives:
+        return None, {}, separate
+    
+    try:
+        combined = re.compile('|'.join(f"(?P<p{i}>{pattern})" for i, (_, pattern, _) in enumerate(alternatives)))
+    except re.error as e:
+        logger.error(f"Error combining placeholder patterns, scanning them one by one: {str(e)}")
+        return None, {}, [(pattern_name, compiled) for pattern_name, _, compiled in alternatives] + separate
+    
+    # The pattern's own first capture group (the name) directly follows its wrapper group
+    group_info = {
+        f"p{i}": (pattern_name, combined.groupindex[f"p{i}"] + 1)
+        for i, (pattern_name, _, _) in enumerate(alternatives)
+    }
+    
+    return combined, group_info, separate
+
+
+def _find_placeholder_matches(text, compiled_patterns):
+    """
+    Yield (pattern_name, match, name group index) in document order
+    
+    Args:
+        text: The document text
+        compiled_patterns: Result of compile_placeholder_patterns
+    """
+    combined, group_info, separate = compiled_patterns
+    
+    combined_matches = ()
+    if combined is not None:
+        combined_matches = (
+            (group_info[match.lastgroup][0], match, group_info[match.lastgroup][1])
+            for match in combined.finditer(text)
+        )
+    
+    if not separate:
+        # Single pass; matches arrive in document order so no sort is needed
+        yield from combined_matches
+        return
+    
+    matches = list(combined_matches)
+    for pattern_name, compiled in separate:
+        matches.extend((pattern_name, match, 1) for match in compiled.finditer(text))
+    
+    # Stable sort keeps the combined scan's choice first at equal positions
+    matches.sort(key=lambda item: item[1].start())
+    yield from matches
+
+
+def detect_placeholders(text, patterns_config, compiled_patterns=None):
+    """
+    Detect placeholders in the document text using regex patterns from config
+    
+    Args:
+        text: The document text
+        patterns_config: Configuration dict with patterns
+        compiled_patterns: Optional result of compile_placeholder_patterns
     
-    # Sort placeholders by position to maintain order
-    placeholders.sort(key=lambda x: x['position']['start'])
+    Returns:
+        list: List of dictionaries containing placeholder information
+    """
+    context_words_count = patterns_config.get('context_words_count', 20)
+    
+    if compiled_patterns is None:
+        compiled_patterns = compile_placeholder_patterns(patterns_config)
+    
+    placeholders = []
+    word_spans = None
+    
+    for placeholder_number, (pattern_name, match, name_group) in enumerate(
+        _find_placeholder_matches(text, compiled_patterns), 1
+    ):
+        placeholder_text = match.group(0)
+        placeholder_name = match.group(name_group).strip()
+        start_pos = match.start()
+        end_pos = match.end()
+        
+        # Extract context using configured word count
+        if word_spans is None:
+            word_spans = build_word_spans(text)
+        context_before, context_after, before_words_actual, after_words_actual = extract_context(
+            text, start_pos, end_pos, context_words_count, word_spans
+        )
+        
+        placeholder_info = {
+            "placeholder_id": f"placeholder_{placeholder_number:03d}",
+            "placeholder": placeholder_text,
+            "placeholder_name": placeholder_name,
+            "description": f"the '{placeholder_name}'",
+            "pattern_type": pattern_name,
+            "position": {
+                "start": start_pos,
+                "end": end_pos
+            },
+            "context_before": context_before,
+            "context_after": context_after,
+            "context_window": {
+                "before_words": before_words_actual,
+                "after_words": after_words_actual
+            },
+            "user_input": None,
+            "status": "pending"
+        }
+        
+        placeholders.append(placeholder_info)
     
     return placeholders
 
 
-def create_marked_document(original_doc_path, placeholders, output_path):
+def create_marked_document(original_doc, placeholders, output_path):
     """
     Create a new document with placeholders marked with unique IDs
     Handles duplicate placeholders by replacing each occurrence sequentially
     
     Args:
-        original_doc_path: Path to the original document
+        original_doc: Already-parsed python-docx Document (modified in place),
+            or a path to the original document
         placeholders: List of placeholder dictionaries (sorted by position)
         output_path: Path where the marked document will be saved
     
     Returns:
         str: Path to the saved marked document
     """
-    doc = Document(original_doc_path)
+    if isinstance(original_doc, (str, os.PathLike)):
+        from docx import Document
+        original_doc = Document(original_doc)
+    doc = original_doc
     
-    # Process each placeholder ONE AT A TIME (handles duplicates)
-    # Sort by position to ensure we replace in document order
+    # Queue the marked text for each distinct placeholder string in document order,
+    # so the Nth occurrence of a duplicate gets the Nth placeholder ID
     placeholders_sorted = sorted(placeholders, key=lambda x: x['position']['start'])
     
+    pending = {}
     for ph in placeholders_sorted:
-        original = ph['placeholder']
-        marked = f"[{ph['placeholder_id']}: {ph['description']}]"
-        replaced = False
-        
-        # Replace the FIRST occurrence found
-        # Try paragraphs first - check paragraph.text (handles split runs)
-        for paragraph in doc.paragraphs:
-            if replaced:
-                break
-            if original in paragraph.text:
-                # Replace in paragraph text (works even if split across runs)
-                new_text = paragraph.text.replace(original, marked, 1)  # Replace FIRST occurrence
-                
-                # Clear all runs and rebuild
-                for run in paragraph.runs:
-                    run.text = ''
-                if paragraph.runs:
-                    paragraph.runs[0].text = new_text
-                else:
-                    paragraph.add_run(new_text)
-                
-                replaced = True
+        pending.setdefault(ph['placeholder'], deque()).append(
+            (ph['placeholder_id'], f"[{ph['placeholder_id']}: {ph['description']}]")
+        )
+    
+    if pending:
+        # One alternation over every distinct placeholder string (longest first so
+        # {{X}} wins over {X}); each paragraph is scanned once instead of once per placeholder
+        combined = re.compile('|'.join(re.escape(original) for original in sorted(pending, key=len, reverse=True)))
+        
+        remaining = [sum(len(queue) for queue in pending.values())]
+        
+        def mark(match):
+            queue = pending.get(match.group(0))
+            if not queue:
+                return match.group(0)
+            remaining[0] -= 1
+            return queue.popleft()[1]
+        
+        def mark_paragraph(paragraph):
+            text = paragraph.text
+            new_text = combined.sub(mark, text)
+            if new_text == text:
+                return
+            
+            # Clear all runs and rebuild (works even if the placeholder is split across runs)
+            runs = paragraph.runs
+            for run in runs:
+                run.text = ''
+            if runs:
+                runs[0].text = new_text
+            else:
+                paragraph.add_run(new_text)
+        
+        # Paragraphs first, then tables (same order as extract_document_text)
+        table_paragraphs = (
+            paragraph
+            for table in doc.tables
+            for row in table.rows
+            for cell in row.cells
+            for paragraph in cell.paragraphs
+        )
+        
+        for paragraph in chain(doc.paragraphs, table_paragraphs):
+            # Everything is marked; skip reading the rest of the document
+            if not remaining[0]:
                 break
+            mark_paragraph(paragraph)
     
-        # If not replaced in paragraphs, try tables
-        if not replaced:
-            for table in doc.tables:
-                if replaced:
-                    break
-                for row in table.rows:
-                    if replaced:
-                        break
-                    for cell in row.cells:
-                        if replaced:
-                            break
-                        for paragraph in cell.paragraphs:
-                            if replaced:
-                                break
-                            if original in paragraph.text:
-                                # Replace in paragraph text (handles split runs)
-                                new_text = paragraph.text.replace(original, marked, 1)
-                                
-                                # Clear all runs and rebuild
-                                for run in paragraph.runs:
-                                    run.text = ''
-                                if paragraph.runs:
-                                    paragraph.runs[0].text = new_text
-                                else:
-                                    paragraph.add_run(new_text)
-                                
-                                replaced = True
-                                break
-        
-        if not replaced:
-            print(f"Warning: Could not find '{original}' for {ph['placeholder_id']}")
+    for original, queue in pending.items():
+        for placeholder_id, _ in queue:
+            logger.warning(f"Could not find '{original}' for {placeholder_id}")
     
     # Save the marked document
     doc.save(output_path)
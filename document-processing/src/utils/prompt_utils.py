@@ -3,14 +3,33 @@ Prompt generation and caching utilities
 Handles question generation with hash-based caching
 """
 
+import logging
 import hashlib
 import os
+import re
 from datetime import datetime
+from functools import lru_cache
+from utils.llm_cache import compute_llm_cache_key, get_cached_response, store_cached_response
+
+logger = logging.getLogger(__name__)
+
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'prompts')
+
+TEMPLATE_VAR_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')  # {{ variable }} slots in prompt templates
+
+
+@lru_cache(maxsize=32)
+def _read_prompt_template(template_name):
+    """Read a template file once per process (errors propagate, so failures aren't cached)"""
+    with open(os.path.join(PROMPTS_DIR, template_name), 'r', encoding='utf-8') as f:
+        return f.read()
 
 
 def load_prompt_template(template_name):
     """
     Load a prompt template from src/prompts/
+    Templates ship with the code, so each file is read once and then served from memory
     
     Args:
         template_name: Name of the template file (e.g., 'question_builder.txt')
@@ -18,20 +37,25 @@ def load_prompt_template(template_name):
     Returns:
         str: Template content
     """
-    prompts_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'prompts')
-    template_path = os.path.join(prompts_dir, template_name)
-    
     try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return _read_prompt_template(template_name)
     except Exception as e:
-        print(f"Error loading template {template_name}: {str(e)}")
+        logger.error(f"Error loading template {template_name}: {str(e)}")
         return ""
 
 
+@lru_cache(maxsize=4)
+def _summary_hasher(document_summary):
+    """SHA256 state already fed the document summary (shared; only ever copied)"""
+    # Formatted like the other fields so a missing (None) summary hashes as before
+    return hashlib.sha256(f"{document_summary}".encode('utf-8'))
+
+
 def compute_prompt_hash(document_summary, placeholder_name, expected_type, context_before, context_after):
     """
     Compute SHA256 hash for prompt caching
+    The summary is the same for every placeholder of a document, so it is hashed
+    once and the remaining fields are fed into a copy of that state
     
     Args:
         document_summary: Document summary text
@@ -43,8 +67,32 @@ def compute_prompt_hash(document_summary, placeholder_name, expected_type, conte
     Returns:
         str: SHA256 hash hex string
     """
-    hash_input = f"{document_summary}{placeholder_name}{expected_type}{context_before}{context_after}"
-    return hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
+    # Same digest as hashing the concatenated fields, so stored hashes stay valid
+    hasher = _summary_hasher(document_summary).copy()
+    for field in (placeholder_name, expected_type, context_before, context_after):
+        hasher.update(f"{field}".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=32)
+def _compile_template(template_content):
+    """
+    Split a template once into (literal, variable name, slot text) segments
+    The trailing literal has variable name None
+    
+    Args:
+        template_content: Template string
+    
+    Returns:
+        tuple: Segments in template order
+    """
+    segments = []
+    position = 0
+    for match in TEMPLATE_VAR_RE.finditer(template_content):
+        segments.append((template_content[position:match.start()], match.group(1), match.group(0)))
+        position = match.end()
+    segments.append((template_content[position:], None, ''))
+    return tuple(segments)
 
 
 def render_prompt_template(template_content, **kwargs):
@@ -58,16 +106,19 @@ def render_prompt_template(template_content, **kwargs):
     Returns:
         str: Rendered template
     """
-    result = template_content
-    for key, value in kwargs.items():
-        placeholder = f"{{{{ {key} }}}}"
-        result = result.replace(placeholder, str(value))
-    return result
+    # Templates are split once; rendering is just lookups and a join (unknown variables are left as-is)
+    parts = []
+    for literal, name, slot in _compile_template(template_content):
+        parts.append(literal)
+        if name is not None:
+            parts.append(str(kwargs[name]) if name in kwargs else slot)
+    return ''.join(parts)
 
 
-def generate_question_prompt(placeholder, document_summary, facts_overlay_by_name, openai_client, model):
+def generate_question_prompt(placeholder, document_summary, facts_overlay_by_name, openai_client, model, cache_path=None):
     """
     Generate a question prompt for a placeholder using LLM
+    Repeated (prompt, model) pairs are served from the cache when cache_path is set
     
     Args:
         placeholder: Placeholder dictionary
@@ -75,6 +126,7 @@ def generate_question_prompt(placeholder, document_summary, facts_overlay_by_nam
         facts_overlay_by_name: Facts overlay keyed by name
         openai_client: OpenAI client
         model: Model to use (qa_model)
+        cache_path: Optional path to a SQLite LLM response cache
     
     Returns:
         str: Generated question text
@@ -98,6 +150,13 @@ def generate_question_prompt(placeholder, document_summary, facts_overlay_by_nam
         facts_overlay_text=facts_text
     )
     
+    cache_key = None
+    if cache_path:
+        cache_key = compute_llm_cache_key(prompt, model)
+        cached = get_cached_response(cache_path, cache_key)
+        if cached is not None:
+            return cached
+    
     try:
         response = openai_client.chat.completions.create(
             model=model,
@@ -105,9 +164,14 @@ def generate_question_prompt(placeholder, document_summary, facts_overlay_by_nam
             temperature=0.3,
             max_tokens=50
         )
-        return response.choices[0].message.content.strip()
+        question = response.choices[0].message.content.strip()
+        
+        if cache_key:
+            store_cached_response(cache_path, cache_key, question, model)
+        
+        return question
     except Exception as e:
-        print(f"Error generating question: {str(e)}")
+        logger.error(f"Error generating question: {str(e)}")
         return f"Please provide the {placeholder['placeholder_name']}."
 
 
@@ -131,7 +195,7 @@ def format_facts_overlay(facts_by_name):
     return "\n".join(lines)
 
 
-def update_prompt_cache(placeholder, document_summary, openai_client, model, facts_overlay_by_name=None):
+def update_prompt_cache(placeholder, document_summary, openai_client, model, facts_overlay_by_name=None, cache_path=None):
     """
     Update prompt_text and prompt_meta for a placeholder if hash changed
     
@@ -141,6 +205,7 @@ def update_prompt_cache(placeholder, document_summary, openai_client, model, fac
         openai_client: OpenAI client
         model: Model to use
         facts_overlay_by_name: Optional facts overlay (injected at LLM call, not in hash)
+        cache_path: Optional path to a SQLite LLM response cache
     
     Returns:
         bool: True if prompt was regenerated
@@ -170,7 +235,8 @@ def update_prompt_cache(placeholder, document_summary, openai_client, model, fac
         document_summary, 
         facts_overlay_by_name,  # Inject current facts into LLM call
         openai_client, 
-        model
+        model,
+        cache_path
     )
     
     # Update metadata
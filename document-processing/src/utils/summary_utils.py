@@ -1,26 +1,83 @@
 """
 Document summary generation utilities
-Handles AI-powered document summarization
+Handles AI-powered document summarization with a content-hash cache
 """
 
 from openai import OpenAI
+import logging
 import os
+from functools import lru_cache
 
+from utils.llm_cache import compute_llm_cache_key, get_cached_response, store_cached_response
 
-def generate_document_summary(document_text, openai_client, model="gpt-4o-mini"):
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_INPUT_TOKENS = 1500  # Token budget for the summarized start of the document
+SUMMARY_INPUT_CHARS = 5000  # Character budget used when tiktoken is not installed
+
+
+@lru_cache(maxsize=8)
+def _get_summary_encoding(model):
+    """Tokenizer for a summary model, or None when tiktoken is unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Model newer than the installed tiktoken
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable for {model}, trimming by characters: {str(e)}")
+        return None
+
+
+def trim_for_summary(document_text, model):
+    """
+    Cut the document down to the part that is sent to the summarizer
+    Uses a SUMMARY_INPUT_TOKENS budget with tiktoken (in requirements.txt); if it is
+    missing or has no encoding for the model, falls back to SUMMARY_INPUT_CHARS
+    
+    Args:
+        document_text: The full document text
+        model: Model used for summarization
+    
+    Returns:
+        str: Start of the document within the summary budget
+    """
+    encoding = _get_summary_encoding(model)
+    
+    if encoding is None:
+        return document_text[:SUMMARY_INPUT_CHARS]
+    
+    # Only tokenize a generous prefix; the budget never reaches past it
+    tokens = encoding.encode(document_text[:SUMMARY_INPUT_TOKENS * 16], disallowed_special=())
+    if len(tokens) <= SUMMARY_INPUT_TOKENS:
+        return document_text[:SUMMARY_INPUT_TOKENS * 16]
+    return encoding.decode(tokens[:SUMMARY_INPUT_TOKENS])
+
+
+def generate_document_summary(document_text, openai_client, model="gpt-4o-mini", cache_path=None):
     """
     Generate a ~100 word summary of the document using OpenAI
+    Re-uploads of the same document are served from the cache when cache_path is set
     
     Args:
         document_text: The full document text
         openai_client: Initialized OpenAI client
         model: Model to use for summarization (default: gpt-4o-mini)
+        cache_path: Optional path to the SQLite LLM response cache
     
     Returns:
         str: Document summary
     """
-    try:
-        prompt = f"""You are a precise summarizer for legal and investment agreements.
+    summary_input = trim_for_summary(document_text, model)
+    
+    prompt = f"""You are a precise summarizer for legal and investment agreements.
 
 Summarize the following document in about 100 words.
 
@@ -34,8 +91,18 @@ Avoid filler language and boilerplate.
 Output only the summary paragraph, without bullets or formatting.
 
 Document Text:
-{document_text[:5000]}"""  # Limit to first 5000 chars to save tokens
-
+{summary_input}"""
+    
+    # Only the text the summarizer sees is in the prompt, so edits past the
+    # summary budget still hit the cache
+    cache_key = None
+    if cache_path:
+        cache_key = compute_llm_cache_key(prompt, model)
+        cached = get_cached_response(cache_path, cache_key)
+        if cached is not None:
+            return cached
+    
+    try:
         response = openai_client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
@@ -43,8 +110,13 @@ Document Text:
             max_tokens=200
         )
         
-        return response.choices[0].message.content.strip()
+        summary = response.choices[0].message.content.strip()
+        
+        if cache_key:
+            store_cached_response(cache_path, cache_key, summary, model)
+        
+        return summary
     except Exception as e:
-        print(f"Error generating document summary: {str(e)}")
+        logger.error(f"Error generating document summary: {str(e)}")
         return "Summary unavailable"
 
@@ -6,7 +6,32 @@ Infers expected_type and priority for placeholders based on keywords and context
 import re
 
 
-def infer_expected_type(placeholder_name, context_before, context_after, type_map_config):
+# Context signals, checked in this order
+DATE_SIGNAL_RE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')  # 1/2/2024, 01-02-24
+MONEY_SIGNAL_RE = re.compile(r'(\$|USD)\s?\d[\d,]*(\.\d{1,2})?')  # $1,000.00, USD 500
+EMAIL_SIGNAL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')  # name@example.com
+
+
+def compile_type_keywords(type_map_config):
+    """
+    Flatten the keyword lists from config into (type_name, keywords) in fallback order
+    Built once per document so each placeholder doesn't walk the config dicts again
+    
+    Args:
+        type_map_config: Type mapping configuration from expected_type_map.json
+    
+    Returns:
+        tuple: ((type_name, (keyword, ...)), ...)
+    """
+    types_config = type_map_config.get('types', {})
+    
+    return tuple(
+        (type_name, tuple(types_config.get(type_name, {}).get('keywords', [])))
+        for type_name in type_map_config.get('fallback_order', [])
+    )
+
+
+def infer_expected_type(placeholder_name, context_before, context_after, type_map_config, type_keywords=None):
     """
     Infer the expected type for a placeholder using keyword matching and regex signals
     
@@ -15,39 +40,34 @@ def infer_expected_type(placeholder_name, context_before, context_after, type_ma
         context_before: Text before the placeholder
         context_after: Text after the placeholder
         type_map_config: Type mapping configuration from expected_type_map.json
+        type_keywords: Optional result of compile_type_keywords
     
     Returns:
         str: Expected type (legal_name, date, monetary_value, etc.)
     """
+    if type_keywords is None:
+        type_keywords = compile_type_keywords(type_map_config)
+    
     placeholder_lower = placeholder_name.lower()
-    combined_context = (context_before + " " + context_after).lower()
     
-    types_config = type_map_config.get('types', {})
-    fallback_order = type_map_config.get('fallback_order', [])
+    # Step 1: Keyword matching in placeholder name (first type in fallback order wins)
+    for type_name, keywords in type_keywords:
+        if any(keyword in placeholder_lower for keyword in keywords):
+            return type_name
     
-    # Step 1: Keyword matching in placeholder name
-    for type_name in fallback_order:
-        type_info = types_config.get(type_name, {})
-        keywords = type_info.get('keywords', [])
-        
-        for keyword in keywords:
-            if keyword in placeholder_lower:
-                return type_name
+    combined_context = (context_before + " " + context_after).lower()
     
     # Step 2: Regex signals in context
     # Date patterns
-    date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
-    if re.search(date_pattern, combined_context):
+    if DATE_SIGNAL_RE.search(combined_context):
         return 'date'
     
     # Money patterns
-    money_pattern = r'(\$|USD)\s?\d[\d,]*(\.\d{1,2})?'
-    if re.search(money_pattern, combined_context):
+    if MONEY_SIGNAL_RE.search(combined_context):
         return 'monetary_value'
     
     # Email patterns
-    email_pattern = r'[^@\s]+@[^@\s]+\.[^@\s]+'
-    if re.search(email_pattern, combined_context):
+    if EMAIL_SIGNAL_RE.search(combined_context):
         return 'email'
     
     # Step 3: Default fallback
@@ -94,12 +114,15 @@ def enrich_placeholders_with_types(placeholders, type_map_config):
     Returns:
         list: Placeholders with expected_type and priority set
     """
+    type_keywords = compile_type_keywords(type_map_config)
+    
     for placeholder in placeholders:
         expected_type = infer_expected_type(
             placeholder['placeholder_name'],
             placeholder['context_before'],
             placeholder['context_after'],
-            type_map_config
+            type_map_config,
+            type_keywords
         )
         
         placeholder['expected_type'] = expected_type
@@ -3,11 +3,17 @@ Input validation and normalization utilities
 Handles placeholder type detection and input validation
 """
 
+import logging
 import re
 import json
-from dateutil import parser as dateutil_parser
 from decimal import Decimal, InvalidOperation
 from utils.format_utils import is_obvious_placeholder
+from utils.date_parser import parse_date_input
+
+logger = logging.getLogger(__name__)
+
+
+MONEY_FORMATTING_TABLE = str.maketrans('', '', '$, ')  # Drops '$', ',' and ' ' in one str.translate pass
 
 
 def validate_local(user_input, expected_type):
@@ -41,19 +47,16 @@ def validate_local(user_input, expected_type):
 
 
 def validate_date(user_input):
-    """Validate date input using dateutil"""
-    try:
-        # Try parsing with dateutil (handles many formats)
-        parsed_date = dateutil_parser.parse(user_input, fuzzy=False)
+    """Validate date input (common formats first, then dateutil)"""
+    if parse_date_input(user_input) is not None:
         return {'valid': True, 'error': None}
-    except (ValueError, TypeError):
-        return {'valid': False, 'error': 'Invalid date format'}
+    return {'valid': False, 'error': 'Invalid date format'}
 
 
 def validate_monetary_value(user_input):
     """Validate monetary value"""
     # Remove common formatting
-    cleaned = user_input.replace('$', '').replace(',', '').replace(' ', '').strip()
+    cleaned = user_input.translate(MONEY_FORMATTING_TABLE).strip()
     
     # Check if it's a valid number
     try:
@@ -82,7 +85,7 @@ def validate_text_type(user_input):
         return {'valid': False, 'error': 'Input too short (minimum 3 characters)'}
     
     # Must contain at least one letter
-    if not any(c.isalpha() for c in user_input):
+    if not any(map(str.isalpha, user_input)):
         return {'valid': False, 'error': 'Input must contain at least one letter'}
     
     # Check for obvious placeholders
@@ -123,17 +126,16 @@ def normalize_value(user_input, expected_type):
 
 def normalize_date(user_input):
     """Normalize date to YYYY-MM-DD"""
-    try:
-        parsed_date = dateutil_parser.parse(user_input, fuzzy=False)
-        return parsed_date.strftime('%Y-%m-%d')
-    except:
+    parsed_date = parse_date_input(user_input)
+    if parsed_date is None:
         return user_input  # Fallback
+    return parsed_date.strftime('%Y-%m-%d')
 
 
 def normalize_monetary_value(user_input):
     """Normalize money to decimal format without symbol"""
     # Remove formatting
-    cleaned = user_input.replace('$', '').replace(',', '').replace(' ', '').strip()
+    cleaned = user_input.translate(MONEY_FORMATTING_TABLE).strip()
     
     try:
         value = Decimal(cleaned)
@@ -192,7 +194,7 @@ def validate_with_llm(user_input, placeholder, document_summary, openai_client,
             'hint': result.get('hint', 'Invalid input')
         }
     except Exception as e:
-        print(f"Error in LLM validation: {str(e)}")
+        logger.error(f"Error in LLM validation: {str(e)}")
         # Fallback
         return {
             'validation': 'INVALID',
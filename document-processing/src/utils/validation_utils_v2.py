@@ -3,13 +3,53 @@ Simplified validation - LLM-only, no local validation
 Much more lenient, extracts exact values without embellishment
 """
 
-import json
+import logging
+import re
+import orjson
 from utils.number_parser import parse_number_input, format_money
+from utils.date_parser import parse_date_input
+from utils.llm_cache import compute_llm_cache_key, get_cached_response, store_cached_response
+from utils.prompt_utils import load_prompt_template, render_prompt_template
 
+logger = logging.getLogger(__name__)
 
-def validate_with_llm_v2(user_input, placeholder, document_summary, openai_client, model):
+
+VALIDATION_JSON_RETRIES = 2  # Re-asks (with the parse error) before falling back to the permissive result
+
+# Inputs that are unambiguously well-formed for their type are accepted without an LLM call
+FAST_VALID_INPUT_RES = {
+    'email': re.compile(r'^[\w.+-]+@[\w-]+(\.[\w-]+)+$'),  # name@example.com
+    'date': re.compile(r'^\d{4}-\d{2}-\d{2}$|^\d{1,2}/\d{1,2}/\d{4}$'),  # 2024-01-15, 1/15/2024
+    'monetary_value': re.compile(r'^\$?(\d{1,3}(,\d{3})+|\d+)(\.\d{1,2})?$'),  # $1,500,000.00, 1500000
+}
+
+
+def is_fast_valid_input(user_input, expected_type):
+    """
+    Check whether input is plainly valid for its type, so the LLM can be skipped
+    
+    Args:
+        user_input: User's input (stripped)
+        expected_type: Expected type
+    
+    Returns:
+        bool: True if the input can be accepted as-is
+    """
+    fast_re = FAST_VALID_INPUT_RES.get(expected_type)
+    if fast_re is None or not fast_re.match(user_input):
+        return False
+    
+    # Shape alone doesn't rule out dates like 2024-02-30
+    if expected_type == 'date':
+        return parse_date_input(user_input) is not None
+    
+    return True
+
+
+def validate_with_llm_v2(user_input, placeholder, document_summary, openai_client, model, cache_path=None):
     """
     Validate input using LLM (GPT-5-nano) - lenient and smart
+    Repeated (prompt, model) pairs are served from the cache when cache_path is set
     
     Args:
         user_input: User's input
@@ -17,6 +57,7 @@ def validate_with_llm_v2(user_input, placeholder, document_summary, openai_clien
         document_summary: Document summary
         openai_client: OpenAI client
         model: Validation model (GPT-5-nano)
+        cache_path: Optional path to a SQLite LLM response cache
     
     Returns:
         dict: {
@@ -25,23 +66,30 @@ def validate_with_llm_v2(user_input, placeholder, document_summary, openai_clien
             'hint': str (if INVALID)
         }
     """
-    from utils.prompt_utils import load_prompt_template, render_prompt_template
-    
-    # Quick pre-filter: empty input
-    if not user_input or not user_input.strip():
+    # Quick pre-filter: empty input (stripped once and reused below)
+    stripped_input = user_input.strip() if user_input else ''
+    if not stripped_input:
         return {
             'validation': 'INVALID',
             'extracted_value': None,
             'hint': 'Input cannot be empty'
         }
     
-    # Load templates
+    # Well-formed emails, dates and amounts don't need the model
+    if is_fast_valid_input(stripped_input, placeholder.get('expected_type', 'text')):
+        return {
+            'validation': 'VALID',
+            'extracted_value': stripped_input,
+            'hint': ''
+        }
+    
+    # Load templates (read once per process); load_prompt_template returns "" when
+    # a file is missing, so fall back to the old template on an empty result
     base_header = load_prompt_template('base_header.txt')
-    try:
-        validation_template = load_prompt_template('validation_checker_v2.txt')
-    except:
-        # Fallback to old template if new one doesn't exist yet
-        validation_template = load_prompt_template('validation_checker.txt')
+    validation_template = (
+        load_prompt_template('validation_checker_v2.txt')
+        or load_prompt_template('validation_checker.txt')
+    )
     
     # Render prompt
     prompt = render_prompt_template(
@@ -54,18 +102,43 @@ def validate_with_llm_v2(user_input, placeholder, document_summary, openai_clien
         context_after=placeholder['context_after']
     )
     
+    cache_key = compute_llm_cache_key(prompt, model) if cache_path else None
+    result_text = get_cached_response(cache_path, cache_key) if cache_key else None
+    
     try:
-        response = openai_client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=150
-        )
-        
-        result_text = response.choices[0].message.content.strip()
-        
-        # Parse JSON response
-        result = json.loads(result_text)
+        if result_text is None:
+            messages = [{"role": "user", "content": prompt}]
+            
+            for attempt in range(VALIDATION_JSON_RETRIES + 1):
+                # JSON mode + greedy decoding: identical prompts give identical, parseable replies
+                response = openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=0.0,
+                    max_tokens=150
+                )
+                
+                result_text = response.choices[0].message.content.strip()
+                
+                # Parse JSON response; malformed output is sent back with the error to fix
+                try:
+                    result = orjson.loads(result_text)
+                    break
+                except orjson.JSONDecodeError as e:
+                    if attempt == VALIDATION_JSON_RETRIES:
+                        raise
+                    logger.warning(f"Malformed validation JSON (attempt {attempt + 1}), retrying: {str(e)}")
+                    messages = messages + [
+                        {"role": "assistant", "content": result_text},
+                        {"role": "user", "content": f"Your output had error: {str(e)}. Respond ONLY with valid JSON matching the schema."}
+                    ]
+            
+            # Only responses that parse are cached
+            if cache_key:
+                store_cached_response(cache_path, cache_key, result_text, model)
+        else:
+            result = orjson.loads(result_text)
         
         validation_status = result.get('validation', 'INVALID')
         extracted_value = result.get('extracted_value', user_input)
@@ -78,13 +151,12 @@ def validate_with_llm_v2(user_input, placeholder, document_summary, openai_clien
         }
         
     except Exception as e:
-        print(f"Error in LLM validation: {str(e)}")
-        print(f"Response was: {result_text if 'result_text' in locals() else 'N/A'}")
+        logger.warning(f"Error in LLM validation: {str(e)}; response was: {result_text!r}")
         
         # Fallback: Be permissive
         return {
             'validation': 'VALID',
-            'extracted_value': user_input.strip(),
+            'extracted_value': stripped_input,
             'hint': ''
         }
 
@@ -116,13 +188,11 @@ def normalize_value_v2(extracted_value, expected_type):
     
     # For dates, try to parse (simple)
     if expected_type == 'date':
-        try:
-            from dateutil import parser as dateutil_parser
-            parsed_date = dateutil_parser.parse(extracted_value, fuzzy=False)
-            return parsed_date.strftime('%Y-%m-%d')
-        except:
+        parsed_date = parse_date_input(extracted_value)
+        if parsed_date is None:
             # If fails, return as-is
             return extracted_value
+        return parsed_date.strftime('%Y-%m-%d')
     
     # For email, lowercase
     if expected_type == 'email':
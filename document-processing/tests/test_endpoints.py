@@ -6,20 +6,28 @@ import unittest
 import sys
 import os
 import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import app as app_module
 from app import app
+from utils import batch_utils, json_io
+from utils.json_io import build_placeholder_indexes, load_reference_json, save_placeholder_update
 
 
 class TestEndpoints(unittest.TestCase):
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.app = app
-        self.client = self.app.test_client()
-        self.app.config['TESTING'] = True
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures (one client shared by every test)"""
+        cls.app = app
+        cls.app.config['TESTING'] = True
+        cls.client = cls.app.test_client()
     
     def test_health_endpoint(self):
         """Test health check endpoint"""
@@ -53,6 +61,217 @@ class TestEndpoints(unittest.TestCase):
         self.assertIn('error', data)
 
 
+
+class TestReferenceEndpoints(unittest.TestCase):
+    """Endpoints that read and write an existing reference (no LLM calls)"""
+    
+    REF_NUMBER = 1
+    
+    def setUp(self):
+        """Create a reference folder with one filled and one pending placeholder"""
+        self.upload_folder = tempfile.mkdtemp()
+        self.original_upload_folder = app.config['UPLOAD_FOLDER']
+        app.config['UPLOAD_FOLDER'] = self.upload_folder
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        
+        self.ref_folder = os.path.join(self.upload_folder, str(self.REF_NUMBER))
+        os.makedirs(self.ref_folder)
+        self.json_path = os.path.join(self.ref_folder, 'doc_placeholders.json')
+        
+        placeholders = [
+            self._placeholder('placeholder_001', 'Company Name', 'filled', 'Acme Inc.'),
+            self._placeholder('placeholder_002', 'Investor Name', 'pending', None)
+        ]
+        placeholder_index, name_to_ids = build_placeholder_indexes(placeholders)
+        self.data = {
+            "reference_number": self.REF_NUMBER,
+            "document_summary": "A SAFE agreement.",
+            "facts_overlay": {"placeholder_001": "Acme Inc."},
+            "facts_overlay_by_name": {"Company Name": "Acme Inc."},
+            "validation_status": "pending",
+            "processing_status": "ready",
+            "batch_job": None,
+            "total_placeholders": len(placeholders),
+            "placeholder_index": placeholder_index,
+            "name_to_ids": name_to_ids,
+            "placeholders": placeholders
+        }
+        self._write_reference()
+    
+    def tearDown(self):
+        app.config['UPLOAD_FOLDER'] = self.original_upload_folder
+        shutil.rmtree(self.upload_folder)
+    
+    def _placeholder(self, placeholder_id, name, status, value):
+        return {
+            "placeholder_id": placeholder_id,
+            "placeholder_name": name,
+            "expected_type": "legal_name",
+            "status": status,
+            "user_input_raw": value,
+            "user_input": value,
+            "attempts": 1 if value else 0
+        }
+    
+    def _write_reference(self):
+        with open(self.json_path, 'w') as f:
+            json.dump(self.data, f)
+    
+    def _read_snapshot(self):
+        """Read the JSON on disk without replaying the journal"""
+        with open(self.json_path, 'r') as f:
+            return json.load(f)
+    
+    def test_journal_replayed_after_crash_before_compaction(self):
+        """Test an undo journaled just before a crashed compaction survives a reload"""
+        with mock.patch.object(json_io, 'JOURNAL_COMPACT_BYTES', 0), \
+                mock.patch.object(json_io, 'save_reference_json', side_effect=RuntimeError('crash')):
+            response = self.client.post(f'/undo/{self.REF_NUMBER}/placeholder_001')
+        self.assertEqual(response.status_code, 500)
+        
+        # The snapshot was never rewritten, so the state lives only in the journal
+        self.assertEqual(self._read_snapshot()['placeholders'][0]['status'], 'filled')
+        
+        # A torn final line from the crash is ignored
+        with open(json_io._journal_path(self.json_path), 'ab') as f:
+            f.write(b'{"placeholder": {"placeholder_id"')
+        
+        response = self.client.get(f'/status/{self.REF_NUMBER}')
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['pending_ordered'], ['placeholder_001', 'placeholder_002'])
+        self.assertEqual(load_reference_json(self.ref_folder)['facts_overlay'], {})
+    
+    def test_undo_across_compaction(self):
+        """Test an undo that compacts the journal keeps earlier journaled updates"""
+        reference = load_reference_json(self.ref_folder)
+        investor = reference['placeholders'][1]
+        investor.update({"status": "filled", "user_input_raw": "Foo Corp", "user_input": "Foo Corp"})
+        reference['facts_overlay']['placeholder_002'] = "Foo Corp"
+        reference['facts_overlay_by_name']['Investor Name'] = "Foo Corp"
+        self.assertTrue(save_placeholder_update(self.ref_folder, reference, 'placeholder_002'))
+        
+        with mock.patch.object(json_io, 'JOURNAL_COMPACT_BYTES', 0):
+            response = self.client.post(f'/undo/{self.REF_NUMBER}/placeholder_001')
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['progress']['pending'], 1)
+        self.assertEqual(data['progress']['filled'], 1)
+        
+        # Compaction folded both updates into the snapshot and dropped the journal
+        self.assertFalse(os.path.exists(json_io._journal_path(self.json_path)))
+        snapshot = self._read_snapshot()
+        self.assertEqual([p['status'] for p in snapshot['placeholders']], ['pending', 'filled'])
+        self.assertEqual(snapshot['facts_overlay'], {"placeholder_002": "Foo Corp"})
+        self.assertEqual(snapshot['facts_overlay_by_name'], {"Investor Name": "Foo Corp"})
+    
+    def test_conflict_while_processing(self):
+        """Test fill and undo are rejected while background processing runs"""
+        self.data['processing_status'] = "processing"
+        self.data['processing_started_at'] = datetime.now().isoformat()
+        self._write_reference()
+        
+        # /placeholders doesn't wait for the job; the client polls /status
+        response = self.client.get(f'/placeholders/{self.REF_NUMBER}')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.data)['processing_status'], 'processing')
+        
+        response = self.client.post(
+            f'/fill_placeholder/{self.REF_NUMBER}/placeholder_002',
+            json={'user_input': 'Foo Corp'}
+        )
+        self.assertEqual(response.status_code, 409)
+        
+        response = self.client.post(f'/undo/{self.REF_NUMBER}/placeholder_001')
+        self.assertEqual(response.status_code, 409)
+        
+        # Nothing was written
+        self.assertFalse(os.path.exists(json_io._journal_path(self.json_path)))
+        self.assertEqual(self._read_snapshot()['placeholders'][0]['status'], 'filled')
+    
+    def test_failed_processing(self):
+        """Test a failed reference is reported, blocks fills and can be retried once"""
+        self.data['processing_status'] = "failed"
+        self.data['processing_error'] = "api down"
+        self._write_reference()
+        
+        response = self.client.get(f'/status/{self.REF_NUMBER}')
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['processing_status'], 'failed')
+        self.assertEqual(data['processing_error'], 'api down')
+        
+        response = self.client.post(
+            f'/fill_placeholder/{self.REF_NUMBER}/placeholder_002',
+            json={'user_input': 'Foo Corp'}
+        )
+        self.assertEqual(response.status_code, 409)
+        
+        with mock.patch.object(app_module.upload_executor, 'submit') as submit:
+            response = self.client.post(f'/retry_processing/{self.REF_NUMBER}')
+            self.assertEqual(response.status_code, 202)
+            snapshot = self._read_snapshot()
+            submit.assert_called_once_with(
+                app_module.process_document_llm, self.ref_folder, False, snapshot['processing_started_at']
+            )
+            
+            # Already processing again, so a second retry is rejected
+            response = self.client.post(f'/retry_processing/{self.REF_NUMBER}')
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(submit.call_count, 1)
+        
+        snapshot = self._read_snapshot()
+        self.assertEqual(snapshot['processing_status'], 'processing')
+        self.assertNotIn('processing_error', snapshot)
+    
+    def test_stale_processing_can_be_retried(self):
+        """Test a job lost mid-processing is reported as failed and taken over by a retry"""
+        stale_started_at = datetime.now() - timedelta(seconds=app_module.PROCESSING_STALE_SECONDS + 1)
+        self.data['processing_status'] = "processing"
+        self.data['processing_started_at'] = stale_started_at.isoformat()
+        self._write_reference()
+        
+        response = self.client.get(f'/status/{self.REF_NUMBER}')
+        self.assertEqual(json.loads(response.data)['processing_status'], 'failed')
+        
+        with mock.patch.object(app_module.upload_executor, 'submit') as submit:
+            response = self.client.post(f'/retry_processing/{self.REF_NUMBER}')
+        self.assertEqual(response.status_code, 202)
+        submit.assert_called_once()
+        
+        # The old run finishing late no longer owns the reference
+        snapshot = self._read_snapshot()
+        self.assertNotEqual(snapshot['processing_started_at'], stale_started_at.isoformat())
+        self.assertFalse(app_module.owns_processing(self.ref_folder, stale_started_at.isoformat()))
+
+    
+    def test_status_poll_claims_one_batch_ingest(self):
+        """Test polling a finished batch submits one ingest job and leaves the JSON alone"""
+        self.data['validation_status'] = "batch_pending"
+        self.data['batch_job'] = {"batch_id": "batch_test", "status": "in_progress", "model": "test-model"}
+        self._write_reference()
+        snapshot_before = self._read_snapshot()
+        
+        client = mock.Mock()
+        client.batches.retrieve.return_value = mock.Mock(status='completed')
+        
+        with mock.patch.object(app_module, 'get_openai_client', return_value=client), \
+                mock.patch.object(batch_utils, 'BATCH_POLL_INTERVAL', 0), \
+                mock.patch.object(app_module.upload_executor, 'submit') as submit:
+            for _ in range(2):
+                response = self.client.get(f'/status/{self.REF_NUMBER}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.data)['validation_status'], 'batch_pending')
+        
+        self.assertEqual(client.batches.retrieve.call_count, 2)
+        submit.assert_called_once_with(app_module.ingest_batch_type_inference, self.ref_folder)
+        self.assertEqual(self._read_snapshot(), snapshot_before)
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -54,6 +54,25 @@ class TestPlaceholderDetection(unittest.TestCase):
         self.assertIn('Company Name', names)
         self.assertIn('Investor Name', names)
     
+    def test_flagged_and_backreference_patterns(self):
+        """Test (?i) and \\1 patterns still work alongside the combined scan"""
+        self.patterns_config['patterns'] += [
+            {"name": "angle_brackets", "regex": "(?i)<<(name\\w*)>>", "enabled": True},
+            {"name": "repeated_marker", "regex": "(\\w+)_\\1", "enabled": True}
+        ]
+        text = "Signed by <<NAME_SIGNER>> for [Company Name] ref ab_ab but not ab_cd."
+        
+        placeholders = detect_placeholders(text, self.patterns_config)
+        
+        found = [(p['pattern_type'], p['placeholder_name']) for p in placeholders]
+        self.assertEqual(found, [
+            ('angle_brackets', 'NAME_SIGNER'),
+            ('square_brackets', 'Company Name'),
+            ('repeated_marker', 'ab')
+        ])
+        self.assertEqual([p['placeholder_id'] for p in placeholders],
+                         ['placeholder_001', 'placeholder_002', 'placeholder_003'])
+    
     def test_extract_context(self):
         """Test context extraction around placeholders"""
         text = "This is some text before [Placeholder] and this is text after."
@@ -15,11 +15,12 @@ from utils.validation_utils import determine_expected_type, validate_input_forma
 
 class TestValidation(unittest.TestCase):
     
-    def setUp(self):
-        """Set up test fixtures"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures (type map is read once for the class)"""
         config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'expected_type_map.json')
         with open(config_path, 'r') as f:
-            self.type_map_config = json.load(f)
+            cls.type_map_config = json.load(f)
     
     def test_determine_type_date(self):
         """Test type determination for date placeholders"""
@@ -0,0 +1,29 @@
+"""
+Tests for the LLM-free fast path of validation v2
+"""
+
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.validation_utils_v2 import is_fast_valid_input
+
+
+class TestFastValidInput(unittest.TestCase):
+    
+    def test_money_accepted(self):
+        """Test well-formed amounts skip the LLM"""
+        for value in ["$1,500,000.00", "1500000", "$25", "1,000", "999.5"]:
+            self.assertTrue(is_fast_valid_input(value, 'monetary_value'), value)
+    
+    def test_money_rejected(self):
+        """Test malformed amounts are left to the LLM"""
+        for value in ["1,,000", "1,00", "12,3456", "1,000,", "$", ",100", "1.234", "$1,000.", "1 000"]:
+            self.assertFalse(is_fast_valid_input(value, 'monetary_value'), value)
+
+
+if __name__ == '__main__':
+    unittest.main()